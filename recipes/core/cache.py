@@ -0,0 +1,30 @@
+from functools import partial
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def list_cache_version(model):
+    version = cache.get(_version_key(model))
+    if version is None:
+        version = bump_list_cache(model)
+    return version
+
+
+def bump_list_cache(model):
+    # a fresh token leaves every page cached under the old one unreachable,
+    # including when the token itself was evicted
+    version = uuid4().hex
+    cache.set(_version_key(model), version, None)
+    return version
+
+
+def bump_list_cache_on_commit(model):
+    # bumping before the commit would let a concurrent read cache the old
+    # rows under the new token
+    transaction.on_commit(partial(bump_list_cache, model))
+
+
+def _version_key(model):
+    return "list-version:{}".format(model._meta.label_lower)
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-14 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_bigint_primary_keys"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingredient",
+            name="name",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="unit",
+            name="abbreviation",
+            field=models.CharField(max_length=10, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="unit",
+            name="name",
+            field=models.CharField(max_length=255, unique=True),
+        ),
+    ]
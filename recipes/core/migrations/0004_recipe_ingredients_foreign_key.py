@@ -0,0 +1,77 @@
+import uuid
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def through_to_foreign_key(apps, schema_editor):
+    schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    Recipe = apps.get_model("core", "Recipe")
+    RecipeIngredient = apps.get_model("core", "RecipeIngredient")
+    Through = Recipe.ingredients.through
+
+    seen = set()
+    for row in Through.objects.order_by("recipeingredient_id", "recipe_id"):
+        recipe_ingredient = RecipeIngredient.objects.get(
+            pk=row.recipeingredient_id
+        )
+        if recipe_ingredient.pk in seen:
+            # a row shared by several recipes gets its own copy per recipe
+            recipe_ingredient.pk = None
+            recipe_ingredient.public_id = uuid.uuid4()
+        seen.add(recipe_ingredient.pk)
+        recipe_ingredient.recipe_id = row.recipe_id
+        recipe_ingredient.save()
+
+    # rows no recipe points at were unreachable through the API
+    RecipeIngredient.objects.filter(recipe__isnull=True).delete()
+
+
+def foreign_key_to_through(apps, schema_editor):
+    schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    Recipe = apps.get_model("core", "Recipe")
+    RecipeIngredient = apps.get_model("core", "RecipeIngredient")
+    Recipe.ingredients.through.objects.bulk_create(
+        [
+            Recipe.ingredients.through(
+                recipe_id=recipe_id, recipeingredient_id=pk
+            )
+            for pk, recipe_id in RecipeIngredient.objects.values_list(
+                "pk", "recipe_id"
+            )
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_unique_fields_without_db_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipeingredient",
+            name="recipe",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="core.Recipe",
+            ),
+        ),
+        migrations.RunPython(through_to_foreign_key, foreign_key_to_through),
+        migrations.RemoveField(
+            model_name="recipe",
+            name="ingredients",
+        ),
+        migrations.AlterField(
+            model_name="recipeingredient",
+            name="recipe",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="ingredients",
+                to="core.Recipe",
+            ),
+        ),
+    ]
@@ -0,0 +1,118 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_index(name, table, columns):
+    return migrations.RunSQL(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({})".format(
+            name, table, columns
+        ),
+        "DROP INDEX CONCURRENTLY IF EXISTS {}".format(name),
+    )
+
+
+def drop_index(name, table, columns):
+    index = create_index(name, table, columns)
+    return migrations.RunSQL(index.reverse_sql, index.sql)
+
+
+class Migration(migrations.Migration):
+    # the indexes are built and dropped CONCURRENTLY, which cannot run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0004_recipe_ingredients_foreign_key"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="ingredient",
+            options={
+                "ordering": ("name",),
+                "verbose_name": "Ingredient",
+                "verbose_name_plural": "Ingredients",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="recipe",
+            options={
+                "ordering": ("name", "id"),
+                "verbose_name": "Recipe",
+                "verbose_name_plural": "Recipes",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="recipeingredient",
+            options={
+                "ordering": ("recipe_id", "ingredient_id"),
+                "verbose_name": "Recipe Ingredient",
+                "verbose_name_plural": "Recipes Ingredients",
+            },
+        ),
+        migrations.AlterModelOptions(
+            name="unit",
+            options={
+                "ordering": ("name",),
+                "verbose_name": "Unit",
+                "verbose_name_plural": "Units",
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                create_index("recipe_name_id_idx", "core_recipe", "name, id"),
+                create_index(
+                    "recipeingredient_recipe_idx",
+                    "core_recipeingredient",
+                    "recipe_id, ingredient_id",
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="recipe",
+                    index=models.Index(
+                        fields=["name", "id"], name="recipe_name_id_idx"
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="recipeingredient",
+                    index=models.Index(
+                        fields=["recipe", "ingredient"],
+                        name="recipeingredient_recipe_idx",
+                    ),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                drop_index("core_recipe_name_bc42ce36", "core_recipe", "name"),
+                drop_index(
+                    "core_recipe_name_bc42ce36_like",
+                    "core_recipe",
+                    "name varchar_pattern_ops",
+                ),
+                drop_index(
+                    "core_recipeingredient_recipe_id_3eb2353d",
+                    "core_recipeingredient",
+                    "recipe_id",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="recipe",
+                    name="name",
+                    field=models.CharField(max_length=255),
+                ),
+                migrations.AlterField(
+                    model_name="recipeingredient",
+                    name="recipe",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingredients",
+                        to="core.Recipe",
+                    ),
+                ),
+            ],
+        ),
+    ]
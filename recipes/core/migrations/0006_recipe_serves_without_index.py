@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("core", "0005_ordering_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "DROP INDEX CONCURRENTLY IF EXISTS "
+                    "core_recipe_serves_75ffc014",
+                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                    "core_recipe_serves_75ffc014 ON core_recipe (serves)",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="recipe",
+                    name="serves",
+                    field=models.PositiveIntegerField(),
+                ),
+            ],
+        ),
+    ]
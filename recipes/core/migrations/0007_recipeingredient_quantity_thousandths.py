@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_recipe_serves_without_index"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    "ALTER TABLE core_recipeingredient "
+                    "ALTER COLUMN quantity TYPE integer "
+                    "USING round(greatest(quantity, 0) * 1000), "
+                    "ADD CONSTRAINT core_recipeingredient_quantity_check "
+                    "CHECK (quantity >= 0)",
+                    "ALTER TABLE core_recipeingredient "
+                    "DROP CONSTRAINT core_recipeingredient_quantity_check, "
+                    "ALTER COLUMN quantity TYPE double precision "
+                    "USING quantity / 1000.0",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="recipeingredient",
+                    name="quantity",
+                    field=models.PositiveIntegerField(),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-14 13:45
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_recipeingredient_quantity_thousandths"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="ingredient",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipe",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipeingredient",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="unit",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+    ]
@@ -1,24 +1,38 @@
+import secrets
+import time
 import uuid
 
 from django.contrib.auth import get_user_model
 from django.db.models import (
     Model,
+    BigAutoField,
     DateTimeField,
     UUIDField,
     CharField,
     PositiveIntegerField,
     ForeignKey,
     PROTECT,
-    FloatField,
+    CASCADE,
     TextField,
-    ManyToManyField,
+    Index,
 )
 
 User = get_user_model()
 
 
+def uuid7():
+    # time ordered UUID (version 7): a 48 bit millisecond timestamp followed
+    # by random bits, so new public ids land at the end of the unique index
+    value = (time.time_ns() // 1000000) << 80
+    value |= int.from_bytes(secrets.token_bytes(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76
+    value = value & ~(0x3 << 62) | 0x2 << 62
+    return uuid.UUID(int=value)
+
+
 class BaseModel(Model):
-    id = UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = BigAutoField(primary_key=True)
+    public_id = UUIDField(default=uuid7, unique=True, editable=False)
     created_at = DateTimeField(auto_now_add=True, db_index=True)
     updated_at = DateTimeField(auto_now=True, db_index=True)
 
@@ -27,54 +41,59 @@ class BaseModel(Model):
 
 
 class Recipe(BaseModel):
-    name = CharField(max_length=255, null=False, blank=False, db_index=True)
-    serves = PositiveIntegerField(null=False, blank=False, db_index=True)
-    preparation_time_in_minutes = PositiveIntegerField(
-        null=False, blank=False, db_index=True
-    )
-    preparation = TextField(null=False, blank=False)
-    ingredients = ManyToManyField("core.RecipeIngredient")
-    author = ForeignKey(User, null=False, blank=False, on_delete=PROTECT)
+    name = CharField(max_length=255)
+    serves = PositiveIntegerField()
+    preparation_time_in_minutes = PositiveIntegerField(db_index=True)
+    preparation = TextField()
+    author = ForeignKey(User, on_delete=PROTECT, db_index=True)
 
     class Meta:
         verbose_name = "Recipe"
         verbose_name_plural = "Recipes"
-        ordering = ("name", "-created_at")
+        ordering = ("name", "id")
+        indexes = (Index(fields=("name", "id"), name="recipe_name_id_idx"),)
 
 
 class Ingredient(BaseModel):
-    name = CharField(
-        max_length=255, null=False, blank=False, db_index=True, unique=True
-    )
+    name = CharField(max_length=255, unique=True)
 
     class Meta:
         verbose_name = "Ingredient"
         verbose_name_plural = "Ingredients"
-        ordering = ("name", "-created_at")
+        ordering = ("name",)
 
 
 class Unit(BaseModel):
-    name = CharField(
-        max_length=255, null=False, blank=False, db_index=True, unique=True
-    )
-    abbreviation = CharField(
-        max_length=10, null=False, blank=False, db_index=True, unique=True
-    )
+    name = CharField(max_length=255, unique=True)
+    abbreviation = CharField(max_length=10, unique=True)
 
     class Meta:
         verbose_name = "Unit"
         verbose_name_plural = "Units"
-        ordering = ("name", "-created_at")
+        ordering = ("name",)
 
 
 class RecipeIngredient(BaseModel):
+    recipe = ForeignKey(
+        "core.Recipe",
+        on_delete=CASCADE,
+        related_name="ingredients",
+        db_index=False,
+    )
     ingredient = ForeignKey(
-        "core.Ingredient", null=False, blank=False, on_delete=PROTECT
+        "core.Ingredient", on_delete=PROTECT, db_index=True
     )
-    quantity = FloatField(null=False, blank=False)
-    unit = ForeignKey("core.Unit", null=False, blank=False, on_delete=PROTECT)
+    # stored in thousandths of the unit
+    quantity = PositiveIntegerField()
+    unit = ForeignKey("core.Unit", on_delete=PROTECT, db_index=True)
 
     class Meta:
         verbose_name = "Recipe Ingredient"
         verbose_name_plural = "Recipes Ingredients"
-        ordering = ("recipe__name", "ingredient__name", "-created_at")
+        ordering = ("recipe_id", "ingredient_id")
+        indexes = (
+            Index(
+                fields=("recipe", "ingredient"),
+                name="recipeingredient_recipe_idx",
+            ),
+        )
@@ -1,37 +1,108 @@
+import math
+from collections import defaultdict
+
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Manager, Prefetch, prefetch_related_objects
+from django.utils import timezone
 from drf_writable_nested import (
     UniqueFieldsMixin,
     WritableNestedModelSerializer,
 )
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import (
+    FloatField,
+    ListSerializer,
+    ModelSerializer,
+    ValidationError,
+)
 
+from core.cache import bump_list_cache_on_commit
 from core.models import Unit, Ingredient, RecipeIngredient, Recipe
 
+User = get_user_model()
+
+
+class ThousandthsField(FloatField):
+    def to_internal_value(self, data):
+        value = super().to_internal_value(data)
+        if not math.isfinite(value):
+            self.fail("invalid")
+        return round(value * 1000)
+
+    def run_validators(self, value):
+        # min_value and max_value are given in units, not thousandths
+        super().run_validators(value / 1000)
+
+    def to_representation(self, value):
+        return value / 1000
+
 
 class UnitSerializer(UniqueFieldsMixin, ModelSerializer):
     class Meta:
         model = Unit
-        fields = ("id", "name", "abbreviation")
+        fields = ("public_id", "name", "abbreviation")
 
 
 class IngredientSerializer(UniqueFieldsMixin, ModelSerializer):
     class Meta:
         model = Ingredient
-        fields = ("id", "name")
+        fields = ("public_id", "name")
+
+
+class PublicIdLookupMixin:
+    def _get_related_pk(self, data, model_class):
+        # nested payloads reference existing rows by public_id, since the
+        # integer primary key is not exposed by the API
+        public_id = data.get("public_id")
+        if not public_id or "pk" in data:
+            return super()._get_related_pk(data, model_class)
+        try:
+            pk = (
+                model_class.objects.filter(public_id=public_id)
+                .values_list("pk", flat=True)
+                .first()
+            )
+        except DjangoValidationError:
+            return None
+        return str(pk) if pk else None
 
 
-class RecipeIngredientSerializer(WritableNestedModelSerializer):
+class RecipeIngredientSerializer(
+    PublicIdLookupMixin, WritableNestedModelSerializer
+):
     ingredient = IngredientSerializer(many=False, required=True)
     unit = UnitSerializer(many=False, required=True)
+    # the upper bound is the largest integer column value, in units
+    quantity = ThousandthsField(min_value=0, max_value=2147483.647)
 
     class Meta:
         model = RecipeIngredient
-        fields = ("id", "ingredient", "quantity", "unit")
+        fields = ("public_id", "ingredient", "quantity", "unit")
+
+    def to_representation(self, instance):
+        # built by hand because this runs once per ingredient of every
+        # listed recipe, where walking the nested fields dominates
+        ingredient = instance.ingredient
+        unit = instance.unit
+        return {
+            "public_id": instance.public_id,
+            "ingredient": {
+                "public_id": ingredient.public_id,
+                "name": ingredient.name,
+            },
+            "quantity": instance.quantity / 1000,
+            "unit": {
+                "public_id": unit.public_id,
+                "name": unit.name,
+                "abbreviation": unit.abbreviation,
+            },
+        }
 
 
 class UserSerializer(UniqueFieldsMixin, ModelSerializer):
     class Meta:
-        model = get_user_model()
+        model = User
         fields = (
             "id",
             "username",
@@ -39,6 +110,25 @@ class UserSerializer(UniqueFieldsMixin, ModelSerializer):
         )
 
 
+class EagerLoadingListSerializer(ListSerializer):
+    def to_representation(self, data):
+        # prefetch once for the whole list instead of letting the child
+        # prefetch for every instance that was not eagerly loaded
+        iterable = data.all() if isinstance(data, Manager) else data
+        instances = list(iterable)
+        prefetch_related_objects(
+            [
+                instance
+                for instance in instances
+                if "ingredients"
+                not in getattr(instance, "_prefetched_objects_cache", {})
+            ],
+            *self.child.Meta.nested_select,
+            *self.child.Meta.nested_prefetch,
+        )
+        return super().to_representation(instances)
+
+
 class RecipeSerializer(WritableNestedModelSerializer):
     ingredients = RecipeIngredientSerializer(many=True)
     author = UserSerializer(many=False, required=True)
@@ -46,7 +136,7 @@ class RecipeSerializer(WritableNestedModelSerializer):
     class Meta:
         model = Recipe
         fields = (
-            "id",
+            "public_id",
             "name",
             "serves",
             "preparation_time_in_minutes",
@@ -54,3 +144,256 @@ class RecipeSerializer(WritableNestedModelSerializer):
             "ingredients",
             "author",
         )
+        nested_select = ("author",)
+        # only the columns the nested representation reads are loaded
+        nested_prefetch = (
+            Prefetch(
+                "ingredients",
+                queryset=RecipeIngredient.objects.select_related(
+                    "ingredient", "unit"
+                ).only(
+                    "public_id",
+                    "quantity",
+                    "recipe_id",
+                    "ingredient__public_id",
+                    "ingredient__name",
+                    "unit__public_id",
+                    "unit__name",
+                    "unit__abbreviation",
+                ),
+            ),
+        )
+        list_serializer_class = EagerLoadingListSerializer
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        return queryset.select_related(
+            *cls.Meta.nested_select
+        ).prefetch_related(*cls.Meta.nested_prefetch)
+
+    def to_representation(self, instance):
+        # instances that did not come through setup_eager_loading would
+        # otherwise hit the database once per nested ingredient and unit
+        if "ingredients" not in getattr(
+            instance, "_prefetched_objects_cache", {}
+        ):
+            prefetch_related_objects([instance], *self.Meta.nested_prefetch)
+        representation = {
+            "public_id": instance.public_id,
+            "name": instance.name,
+            "serves": instance.serves,
+            "preparation_time_in_minutes": instance.preparation_time_in_minutes,
+        }
+        if "preparation" in self.Meta.fields:
+            representation["preparation"] = instance.preparation
+        ingredient_representation = self.fields[
+            "ingredients"
+        ].child.to_representation
+        representation["ingredients"] = [
+            ingredient_representation(recipe_ingredient)
+            for recipe_ingredient in instance.ingredients.all()
+        ]
+        author = instance.author
+        representation["author"] = {
+            "id": author.id,
+            "username": author.username,
+            "email": author.email,
+        }
+        return representation
+
+    def create(self, validated_data):
+        ingredients = validated_data.pop("ingredients", [])
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            self._create_ingredients(instance, ingredients)
+        return instance
+
+    def update(self, instance, validated_data):
+        ingredients = validated_data.pop("ingredients", None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if ingredients is not None:
+                self._update_ingredients(instance, ingredients)
+                getattr(instance, "_prefetched_objects_cache", {}).pop(
+                    "ingredients", None
+                )
+        return instance
+
+    def _create_ingredients(self, instance, ingredients):
+        # the nested walker saves every ingredient, unit and recipe
+        # ingredient with its own queries, so they are written in bulk here
+        return RecipeIngredient.objects.bulk_create(
+            self._fill_ingredients(
+                [RecipeIngredient(recipe=instance) for _ in ingredients],
+                ingredients,
+            )
+        )
+
+    def _update_ingredients(self, instance, ingredients):
+        # rows sent back with their public_id keep it and are updated in
+        # place, rows left out of the payload are deleted
+        existing = {
+            str(row.public_id): row for row in instance.ingredients.all()
+        }
+        rows = self._fill_ingredients(
+            [
+                existing.pop(str(data.get("public_id")), None)
+                or RecipeIngredient(recipe=instance)
+                for data in self.initial_data["ingredients"]
+            ],
+            ingredients,
+        )
+        if existing:
+            RecipeIngredient.objects.filter(
+                pk__in=[row.pk for row in existing.values()]
+            ).delete()
+        RecipeIngredient.objects.bulk_update(
+            [row for row in rows if row.pk],
+            ("ingredient", "unit", "quantity", "updated_at"),
+        )
+        RecipeIngredient.objects.bulk_create(
+            [row for row in rows if not row.pk]
+        )
+
+    def _fill_ingredients(self, rows, ingredients):
+        ingredients_by_name = self._get_or_create_by_name(
+            Ingredient, [data["ingredient"] for data in ingredients]
+        )
+        units_by_name = self._get_or_create_by_name(
+            Unit, [data["unit"] for data in ingredients]
+        )
+        # bulk_update does not set auto_now fields by itself
+        now = timezone.now()
+        for row, data in zip(rows, ingredients):
+            row.ingredient = ingredients_by_name[data["ingredient"]["name"]]
+            row.unit = units_by_name[data["unit"]["name"]]
+            row.quantity = data["quantity"]
+            row.updated_at = now
+        return rows
+
+    @staticmethod
+    def _get_or_create_by_name(model_class, items):
+        items = {item["name"]: item for item in items}
+        if not items:
+            return {}
+        now = timezone.now()
+        fields = [
+            field
+            for field in model_class._meta.concrete_fields
+            if not field.primary_key
+        ]
+        params = [
+            field.get_db_prep_save(
+                getattr(instance, field.attname), connection
+            )
+            for instance in (
+                model_class(created_at=now, updated_at=now, **item)
+                for item in items.values()
+            )
+            for field in fields
+        ]
+        row = "({})".format(", ".join(["%s"] * len(fields)))
+        # a single INSERT ... ON CONFLICT both creates the missing rows and
+        # returns the existing ones, matched on the unique name
+        query = (
+            "INSERT INTO {table} ({columns}) VALUES {rows} "
+            "ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name "
+            "RETURNING *"
+        ).format(
+            table=connection.ops.quote_name(model_class._meta.db_table),
+            columns=", ".join(
+                connection.ops.quote_name(field.column) for field in fields
+            ),
+            rows=", ".join([row] * len(items)),
+        )
+        try:
+            instances = list(model_class.objects.raw(query, params))
+        except IntegrityError:
+            # another unique field, like Unit.abbreviation, is already taken
+            raise ValidationError(
+                {
+                    "ingredients": [
+                        "{} conflicts with an existing one.".format(
+                            model_class._meta.verbose_name
+                        )
+                    ]
+                }
+            )
+        if any(instance.created_at == now for instance in instances):
+            # rows that already existed keep their created_at
+            bump_list_cache_on_commit(model_class)
+        return {instance.name: instance for instance in instances}
+
+
+class RecipeListSerializer(RecipeSerializer):
+    class Meta(RecipeSerializer.Meta):
+        fields = tuple(
+            field
+            for field in RecipeSerializer.Meta.fields
+            if field != "preparation"
+        )
+        values = (
+            "id",
+            "public_id",
+            "name",
+            "serves",
+            "preparation_time_in_minutes",
+            "author__id",
+            "author__username",
+            "author__email",
+        )
+        ingredient_values = (
+            "recipe_id",
+            "public_id",
+            "quantity",
+            "ingredient__public_id",
+            "ingredient__name",
+            "unit__public_id",
+            "unit__name",
+            "unit__abbreviation",
+        )
+
+    @classmethod
+    def setup_values(cls, queryset):
+        return queryset.values(*cls.Meta.values)
+
+    @classmethod
+    def represent_values(cls, recipes):
+        # same output as to_representation, built from values() rows so no
+        # model instance is created for recipes, ingredients or authors
+        ingredients = defaultdict(list)
+        for row in RecipeIngredient.objects.filter(
+            recipe_id__in=[recipe["id"] for recipe in recipes]
+        ).values(*cls.Meta.ingredient_values):
+            ingredients[row["recipe_id"]].append(
+                {
+                    "public_id": row["public_id"],
+                    "ingredient": {
+                        "public_id": row["ingredient__public_id"],
+                        "name": row["ingredient__name"],
+                    },
+                    "quantity": row["quantity"] / 1000,
+                    "unit": {
+                        "public_id": row["unit__public_id"],
+                        "name": row["unit__name"],
+                        "abbreviation": row["unit__abbreviation"],
+                    },
+                }
+            )
+        return [
+            {
+                "public_id": recipe["public_id"],
+                "name": recipe["name"],
+                "serves": recipe["serves"],
+                "preparation_time_in_minutes": recipe[
+                    "preparation_time_in_minutes"
+                ],
+                "ingredients": ingredients[recipe["id"]],
+                "author": {
+                    "id": recipe["author__id"],
+                    "username": recipe["author__username"],
+                    "email": recipe["author__email"],
+                },
+            }
+            for recipe in recipes
+        ]
@@ -1,12 +1,20 @@
-import json
-import re
+import time
+import uuid
+import warnings
 from copy import copy
 from unittest.case import skip
 
+from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.db import connection
 from django.test import TestCase
 from model_bakery import baker
-from rest_framework.exceptions import ValidationError
+import orjson
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
 from rest_framework.status import (
     HTTP_200_OK,
     HTTP_201_CREATED,
@@ -14,36 +22,107 @@ from rest_framework.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
 )
-from rest_framework.test import APIClient
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    force_authenticate,
+)
 
-from core.models import Unit, Ingredient, RecipeIngredient, Recipe
+from core.models import Unit, Ingredient, RecipeIngredient, Recipe, uuid7
 from core.serializers import (
     UnitSerializer,
     IngredientSerializer,
     RecipeIngredientSerializer,
+    RecipeListSerializer,
     RecipeSerializer,
 )
+from core.views import (
+    CustomPageNumberPagination,
+    EstimatedCountPaginator,
+    RecipeViewSet,
+    related_lookups,
+)
 
-UUID_PATTERN = r"(?P<uuid>[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-4[0-9a-fA-F]{3}-[89abAB][0-9a-fA-F]{3}-[0-9a-fA-F]{12})"
+User = get_user_model()
+
+
+def is_uuid(value, types=(str, uuid.UUID)):
+    if not isinstance(value, types):
+        return False
+    try:
+        parsed = uuid.UUID(str(value))
+    except ValueError:
+        return False
+    return parsed.version in (4, 7) and parsed.variant == uuid.RFC_4122
+
+
+def is_text(value, max_length):
+    return isinstance(value, str) and 0 < len(value) <= max_length
+
+
+class UUID7TestCase(TestCase):
+    def test_version_and_variant(self):
+        value = uuid7()
+        self.assertEqual(7, value.version)
+        self.assertEqual(uuid.RFC_4122, value.variant)
+
+    def test_later_values_sort_after_earlier_ones(self):
+        first = uuid7()
+        time.sleep(0.002)
+        self.assertLess(first, uuid7())
+
+
+# fixed values for the columns each model requires, the index keeps the
+# unique ones apart
+BULK_FIELDS = {
+    "core.Unit": lambda index: {
+        "name": "unit {}".format(index),
+        "abbreviation": "u{}".format(index),
+    },
+    "core.Ingredient": lambda index: {"name": "ingredient {}".format(index)},
+    "core.Recipe": lambda index: {
+        "name": "recipe {}".format(index),
+        "serves": 2,
+        "preparation_time_in_minutes": 30,
+        "preparation": "mix and bake",
+    },
+    "core.RecipeIngredient": lambda index: {"quantity": 1000},
+    "social.Comment": lambda index: {"content": "a comment"},
+    "social.Like": lambda index: {},
+}
+
+
+def bulk_make(model_str, quantity, **attrs):
+    # plain constructors and one INSERT for the whole batch, without baker
+    # generating a value for every field
+    model = apps.get_model(model_str)
+    return model.objects.bulk_create(
+        [
+            model(**{**BULK_FIELDS[model_str](index), **attrs})
+            for index in range(quantity)
+        ]
+    )
 
 
 class BaseSerializerTestCaseMixin:
     def create_instance(self):
-        return baker.make(
-            getattr(self, "model_str"), **self.get_default_data()
-        )
+        return baker.make(self.model_str, **self.get_default_data())
 
     def get_full_data(self):
-        return getattr(self, "full_data")
+        # a shallow copy, tests only ever replace top level keys
+        return {**self.full_data}
 
     def get_default_data(self):
-        return getattr(self, "default_data")
+        return self.default_data
 
     def get_update_data(self):
-        return getattr(self, "update_data")
+        return self.update_data
+
+    def get_list_data(self):
+        return {}
 
     def get_serializer_class(self):
-        return getattr(self, "serializer_class")
+        return self.serializer_class
 
     def create_instance_to_be_duplicated_on_post(self):
         return self.create_instance()
@@ -54,13 +133,9 @@ class BaseSerializerTestCaseMixin:
     def get_queryset(self):
         qset = getattr(self, "queryset", None)
         if not qset:
-            qset = getattr(self, "model").objects.all()
+            qset = self.model.objects.all()
         return qset
 
-    def tearDown(self):
-        for model in getattr(self, "models_to_clean", []):
-            model.objects.all().delete()
-
     def test_is_valid_with_all_data(self):
         serializer = self.get_serializer_class()(
             data=self.get_full_data(), many=False
@@ -69,7 +144,7 @@ class BaseSerializerTestCaseMixin:
         self.assertTrue(result)
 
     def test_is_invalid_without_required_data(self):
-        _required = getattr(self, "required_data")
+        _required = self.required_data
         if _required:
             _data = {
                 key: value
@@ -85,7 +160,7 @@ class BaseSerializerTestCaseMixin:
     def test_is_invalid_with_duplicated_unique_data(
         self,
     ):
-        if getattr(self, "unique_fields"):
+        if self.unique_fields:
             self.create_instance_to_be_duplicated_on_post()
 
             serializer = self.get_serializer_class()(
@@ -114,7 +189,7 @@ class BaseSerializerTestCaseMixin:
     def test_update_is_valid_with_no_changes(self):
         instance = self.create_instance()
         _data = self.get_full_data()
-        _data.update({"id": instance.id})
+        _data.update({"public_id": instance.public_id})
         serializer = self.get_serializer_class()(
             instance=instance, data=_data, many=False
         )
@@ -132,11 +207,11 @@ class BaseSerializerTestCaseMixin:
             self.assertTrue(result)
 
     def test_list_correctly(self):
-        baker.make(getattr(self, "model_str"), _quantity=42)
+        bulk_make(self.model_str, 42, **self.get_list_data())
         qset = self.get_queryset()
         serializer = self.get_serializer_class()(qset, many=True)
         result = all(
-            [self.dict_structure_is_valid(_item) for _item in serializer.data]
+            self.dict_structure_is_valid(_item) for _item in serializer.data
         )
         self.assertTrue(result)
 
@@ -149,26 +224,19 @@ class BaseAPITestCaseMixin:
     empty_list_response_count = 0
     authenticated_list_response_count = 1
 
-    def tearDown(self):
-        for _model in self.models_to_clean:
-            _model.objects.all().delete()
-
-    def _login(self):
-        self.user, _ = get_user_model().objects.get_or_create(
-            email="test@test.com"
-        )
-        self.client.force_authenticate(user=self.user)
+    def get_list_data(self):
+        return {}
 
     def test_empty_list_not_authenticated(self):
+        self.client.force_authenticate(user=None)
         response = self.client.get(self.base_url, format="json")
         self.assertEqual(HTTP_401_UNAUTHORIZED, response.status_code)
 
     def test_empty_list_authenticated(self):
         self.model_class.objects.all().delete()
-        self._login()
 
         response = self.client.get(self.base_url, format="json")
-        content = json.loads(response.content)
+        content = response.data
         self.assertEqual(HTTP_200_OK, response.status_code)
         self.assertEqual(self.empty_list_response_count, content.get("count"))
         self.assertEqual(None, content.get("next"))
@@ -178,13 +246,11 @@ class BaseAPITestCaseMixin:
         )
 
     def test_list_authenticated(self):
-        self._login()
-
         response = self.client.get(self.base_url, format="json")
 
         self.assertEqual(HTTP_200_OK, response.status_code)
 
-        content_result = json.loads(response.content)
+        content_result = response.data
 
         self.assertEqual(
             self.authenticated_list_response_count, content_result.get("count")
@@ -197,14 +263,13 @@ class BaseAPITestCaseMixin:
         self.assert_result_and_stored(result=result, stored=self.first_element)
 
     def test_list_authenticated_paginated(self):
-        baker.make(self.model_class_str, self.qtt)
-        self._login()
+        bulk_make(self.model_class_str, self.qtt, **self.get_list_data())
 
         response = self.client.get(self.base_url, format="json")
 
         self.assertEqual(HTTP_200_OK, response.status_code)
 
-        content_result = json.loads(response.content)
+        content_result = response.data
 
         expected_count = getattr(
             self, "list_counter", self.qtt + self.start_counter
@@ -217,17 +282,14 @@ class BaseAPITestCaseMixin:
         self.assertEqual(None, content_result.get("previous"))
         self.assertEqual(10, len(content_result.get("results")))
 
-    def test_list_authenticated_paginated_page_2(self):
-        baker.make(self.model_class_str, self.qtt)
-        self._login()
-
+        # the second page reuses the batch instead of baking its own
         response = self.client.get(
             "{}?page=2".format(self.base_url), format="json"
         )
 
         self.assertEqual(HTTP_200_OK, response.status_code)
 
-        content_result = json.loads(response.content)
+        content_result = response.data
 
         self.assertEqual(
             self.qtt + self.start_counter, content_result.get("count")
@@ -243,6 +305,7 @@ class BaseAPITestCaseMixin:
         self.assertEqual(10, len(content_result.get("results")))
 
     def test_create_not_authenticated(self):
+        self.client.force_authenticate(user=None)
         response = self.client.post(
             self.base_url,
             data=self.post_data,
@@ -252,7 +315,6 @@ class BaseAPITestCaseMixin:
 
     def test_create_authenticated(self):
         counter = self.model_class.objects.all().count()
-        self._login()
         self.assertEqual(self.start_counter, counter)
 
         response = self.client.post(
@@ -265,16 +327,17 @@ class BaseAPITestCaseMixin:
             self.after_create_counter, self.model_class.objects.all().count()
         )
 
-        result = json.loads(response.content)
+        result = response.data
 
-        stored = self.model_class.objects.get(pk=result.get("id"))
+        stored = self.model_class.objects.get(
+            public_id=result.get("public_id")
+        )
 
         self.assert_result_and_stored(result=result, stored=stored)
 
     def test_create_missing_required_bad_request_if_any_required(
         self,
     ):
-        self._login()
         _data = {
             key: value
             for key, value in self.post_data.items()
@@ -293,30 +356,21 @@ class BaseAPITestCaseMixin:
     def test_create_duplicated_unique_bad_request_if_any(
         self,
     ):
-        self._login()
-
-        _duplicated_data = copy(self.post_data)
-        for key in self.unique_fields:
-            _duplicated_data.update(
-                {key: getattr(self.first_element, key, None)}
-            )
-
-        response = self.client.post(
-            self.base_url,
-            data=_duplicated_data,
-            format="json",
-        )
         if self.unique_fields:
+            response = self.client.post(
+                self.base_url,
+                data=self.duplicated_post_data,
+                format="json",
+            )
             self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
         else:
             skip("Not applicable, model does not have any unique field.")
 
     def test_update_authenticated(self):
         counter = self.model_class.objects.all().count()
-        self._login()
         self.assertEqual(self.start_counter, counter)
 
-        element_id = self.first_element.pk
+        element_id = self.first_element.public_id
         response = self.client.put(
             "{}{}/".format(self.base_url, element_id),
             data=self.update_data,
@@ -327,19 +381,18 @@ class BaseAPITestCaseMixin:
             self.start_counter, self.model_class.objects.all().count()
         )
 
-        result = json.loads(response.content)
+        result = response.data
 
-        updated = self.model_class.objects.get(pk=element_id)
+        updated = self.model_class.objects.get(public_id=element_id)
 
         self.assert_result_and_stored(result=result, stored=updated)
 
     def test_update_authenticated_ok_when_data_does_not_changes(self):
         counter = self.model_class.objects.all().count()
-        self._login()
         self.assertEqual(self.start_counter, counter)
 
         response = self.client.put(
-            "{}{}/".format(self.base_url, self.first_element.id),
+            "{}{}/".format(self.base_url, self.first_element.public_id),
             data=self.post_data,
             format="json",
         )
@@ -348,19 +401,18 @@ class BaseAPITestCaseMixin:
             self.start_counter, self.model_class.objects.all().count()
         )
 
-        result = json.loads(response.content)
+        result = response.data
 
-        updated = self.model_class.objects.get(pk=self.first_element.id)
+        updated = self.model_class.objects.get(pk=self.first_element.pk)
         self.assert_result_and_stored(result=result, stored=updated)
 
     def test_update_patch_authenticated(self):
         counter = self.model_class.objects.all().count()
-        self._login()
         self.assertEqual(self.start_counter, counter)
 
         for key, value in self.update_data.items():
             response = self.client.patch(
-                "{}{}/".format(self.base_url, self.first_element.id),
+                "{}{}/".format(self.base_url, self.first_element.public_id),
                 data={key: value},
                 format="json",
             )
@@ -369,17 +421,16 @@ class BaseAPITestCaseMixin:
                 self.start_counter, self.model_class.objects.all().count()
             )
 
-            result = json.loads(response.content)
+            result = response.data
 
-            updated = self.model_class.objects.get(pk=self.first_element.id)
+            updated = self.model_class.objects.get(pk=self.first_element.pk)
             self.assert_result_and_stored(result=result, stored=updated)
 
     def test_delete_authenticated(self):
         counter = self.model_class.objects.all().count()
-        self._login()
         self.assertEqual(self.start_counter, counter)
 
-        element_id = self.first_element.pk
+        element_id = self.first_element.public_id
         response = self.client.delete(
             "{}{}/".format(self.base_url, element_id),
             format="json",
@@ -390,9 +441,7 @@ class BaseAPITestCaseMixin:
         )
 
     def test_retrieve_authenticated(self):
-        self._login()
-
-        element_id = self.first_element.pk
+        element_id = self.first_element.public_id
         response = self.client.get(
             "{}{}/".format(self.base_url, element_id),
             format="json",
@@ -400,7 +449,7 @@ class BaseAPITestCaseMixin:
 
         self.assertEqual(HTTP_200_OK, response.status_code)
 
-        result = json.loads(response.content)
+        result = response.data
 
         self.assert_result_and_stored(result=result, stored=self.first_element)
 
@@ -416,27 +465,17 @@ class UnitSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
     model = Unit
 
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = (
-                result
-                and isinstance(data["name"], str)
-                and 0 < len(data["name"]) <= 255
-            )
-            result = (
-                result
-                and isinstance(data["abbreviation"], str)
-                and 0 < len(data["abbreviation"]) <= 10
-            )
-        except:
-            result = False
+            if not is_uuid(data["public_id"], str):
+                return False
+            if not is_text(data["name"], 255):
+                return False
+            if not is_text(data["abbreviation"], 10):
+                return False
+        except KeyError:
+            return False
 
-        return result
+        return True
 
 
 class IngredientSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
@@ -450,22 +489,15 @@ class IngredientSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
     model = Ingredient
 
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = (
-                result
-                and isinstance(data["name"], str)
-                and 0 < len(data["name"]) <= 255
-            )
-        except:
-            result = False
+            if not is_uuid(data["public_id"], str):
+                return False
+            if not is_text(data["name"], 255):
+                return False
+        except KeyError:
+            return False
 
-        return result
+        return True
 
 
 class RecipeIngredientSerializerTestCase(
@@ -477,87 +509,104 @@ class RecipeIngredientSerializerTestCase(
     serializer_class = RecipeIngredientSerializer
     model = RecipeIngredient
 
-    def setUp(self):
-        self.unit = baker.make("core.Unit")
-        self.unit2 = baker.make("core.Unit")
-        self.ingredient = baker.make("core.Ingredient")
-        self.ingredient2 = baker.make("core.Ingredient")
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipe = baker.make("core.Recipe")
+        cls.unit, cls.unit2 = Unit.objects.bulk_create(
+            [
+                Unit(name="teaspoon", abbreviation="tsp"),
+                Unit(name="tablespoon", abbreviation="tbsp"),
+            ]
+        )
+        cls.ingredient, cls.ingredient2 = Ingredient.objects.bulk_create(
+            [Ingredient(name="flour"), Ingredient(name="sugar")]
+        )
 
-    def get_full_data(self):
-        return {
+        cls.full_data = {
             "ingredient": {
-                "id": self.ingredient.id,
-                "name": self.ingredient.name,
+                "public_id": cls.ingredient.public_id,
+                "name": cls.ingredient.name,
             },
             "unit": {
-                "id": self.unit.id,
-                "name": self.unit.name,
-                "abbreviation": self.unit.abbreviation,
+                "public_id": cls.unit.public_id,
+                "name": cls.unit.name,
+                "abbreviation": cls.unit.abbreviation,
             },
             "quantity": 42,
         }
 
-    def get_default_data(self):
-        return {
-            "ingredient_id": self.ingredient.id,
-            "unit_id": self.unit.id,
+        cls.default_data = {
+            "ingredient_id": cls.ingredient.id,
+            "unit_id": cls.unit.id,
             "quantity": 42,
         }
 
-    def get_update_data(self):
-        return {
+        cls.update_data = {
             "ingredient": {
-                "id": self.ingredient2.id,
-                "name": self.ingredient2.name,
+                "public_id": cls.ingredient2.public_id,
+                "name": cls.ingredient2.name,
             },
             "unit": {
-                "id": self.unit2.id,
-                "name": self.unit2.name,
-                "abbreviation": self.unit2.abbreviation,
+                "public_id": cls.unit2.public_id,
+                "name": cls.unit2.name,
+                "abbreviation": cls.unit2.abbreviation,
             },
             "quantity": 51,
         }
 
+    def get_list_data(self):
+        return {
+            "recipe": self.recipe,
+            "ingredient": self.ingredient,
+            "unit": self.unit,
+        }
+
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = result and isinstance(data["quantity"], float)
-            result = (
-                result
-                and isinstance(data["ingredient"]["id"], str)
-                and re.match(
-                    pattern=UUID_PATTERN, string=data["ingredient"]["id"]
+            if not is_uuid(data["public_id"]):
+                return False
+            if not isinstance(data["quantity"], float):
+                return False
+            if not is_uuid(data["ingredient"]["public_id"]):
+                return False
+            if not is_text(data["ingredient"]["name"], 255):
+                return False
+            if not is_uuid(data["unit"]["public_id"]):
+                return False
+            if not is_text(data["unit"]["name"], 255):
+                return False
+            if not is_text(data["unit"]["abbreviation"], 10):
+                return False
+        except (KeyError, TypeError):
+            return False
+
+        return True
+
+    def test_quantity_must_fit_the_column(self):
+        for quantity, valid in (
+            ("nan", False),
+            ("inf", False),
+            ("-inf", False),
+            (10000000, False),
+            (-0.001, False),
+            (2147483.647, True),
+        ):
+            with self.subTest(quantity=quantity):
+                serializer = RecipeIngredientSerializer(
+                    data=dict(self.get_full_data(), quantity=quantity)
                 )
-            )
-            result = (
-                result
-                and isinstance(data["ingredient"]["name"], str)
-                and 0 < len(data["ingredient"]["name"]) <= 255
-            )
-            result = (
-                result
-                and isinstance(data["unit"]["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["unit"]["id"])
-            )
-            result = (
-                result
-                and isinstance(data["unit"]["name"], str)
-                and 0 < len(data["unit"]["name"]) <= 255
-            )
-            result = (
-                result
-                and isinstance(data["unit"]["abbreviation"], str)
-                and 0 < len(data["unit"]["abbreviation"]) <= 10
-            )
-        except:
-            result = False
+                self.assertEqual(valid, serializer.is_valid())
+                if not valid:
+                    self.assertIn("quantity", serializer.errors)
 
-        return result
+    def test_largest_quantity_is_saved(self):
+        serializer = RecipeIngredientSerializer(
+            data=dict(self.get_full_data(), quantity=2147483.647)
+        )
+        self.assertTrue(serializer.is_valid())
+        instance = serializer.save(recipe=self.recipe)
+        instance.refresh_from_db()
+        self.assertEqual(2147483647, instance.quantity)
 
 
 class RecipeSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
@@ -566,160 +615,249 @@ class RecipeSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
     model_str = "core.Recipe"
     serializer_class = RecipeSerializer
     model = Recipe
-    models_to_clean = (
-        Recipe,
-        RecipeIngredient,
-        Ingredient,
-        Unit,
-        get_user_model(),
-    )
 
-    def setUp(self):
-        self.author, _ = get_user_model().objects.get_or_create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, _ = User.objects.get_or_create(
             username="foobar", email="foo@foo.bar"
         )
-        self.unit = baker.make("core.Unit")
-        self.unit2 = baker.make("core.Unit")
-        self.ingredient = baker.make("core.Ingredient")
-        self.ingredient2 = baker.make("core.Ingredient")
-        self.recipe_ingredient = baker.make(
-            "core.RecipeIngredient", unit=self.unit, ingredient=self.ingredient
+        cls.unit, cls.unit2 = Unit.objects.bulk_create(
+            [
+                Unit(name="teaspoon", abbreviation="tsp"),
+                Unit(name="tablespoon", abbreviation="tbsp"),
+            ]
         )
-        self.recipe_ingredient2 = baker.make(
-            "core.RecipeIngredient",
-            unit=self.unit2,
-            ingredient=self.ingredient2,
+        cls.ingredient, cls.ingredient2 = Ingredient.objects.bulk_create(
+            [Ingredient(name="flour"), Ingredient(name="sugar")]
+        )
+        recipe = Recipe.objects.create(
+            name="bread",
+            serves=2,
+            preparation_time_in_minutes=90,
+            preparation="knead and bake",
+            author=cls.author,
+        )
+        cls.recipe_ingredient = RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=cls.ingredient,
+            unit=cls.unit,
+            quantity=500000,
+        )
+        cls.recipe_ingredient2 = RecipeIngredient.objects.create(
+            recipe=recipe,
+            ingredient=cls.ingredient2,
+            unit=cls.unit2,
+            quantity=10000,
         )
 
-    def get_full_data(self):
-        return {
+        cls.full_data = {
             "name": "Recipe",
             "author": {
-                "id": self.author.id,
-                "email": self.author.email,
-                "username": self.author.username,
+                "id": cls.author.id,
+                "email": cls.author.email,
+                "username": cls.author.username,
             },
             "serves": 42,
             "preparation_time_in_minutes": 420,
             "preparation": "preparation steps again",
             "ingredients": [
                 {
-                    "id": self.recipe_ingredient.id,
+                    "public_id": cls.recipe_ingredient.public_id,
                     "ingredient": {
-                        "id": self.ingredient.id,
-                        "name": self.ingredient.name,
+                        "public_id": cls.ingredient.public_id,
+                        "name": cls.ingredient.name,
                     },
                     "unit": {
-                        "id": self.unit.id,
-                        "name": self.unit.name,
-                        "abbreviation": self.unit.abbreviation,
+                        "public_id": cls.unit.public_id,
+                        "name": cls.unit.name,
+                        "abbreviation": cls.unit.abbreviation,
                     },
                     "quantity": 42,
                 }
             ],
         }
 
-    def get_default_data(self):
-        return {
+        cls.default_data = {
             "name": "Recipe",
-            "author_id": self.author.id,
+            "author_id": cls.author.id,
             "serves": 42,
             "preparation_time_in_minutes": 420,
             "preparation": "preparation steps again",
         }
 
-    def get_update_data(self):
-        return {
+        cls.update_data = {
             "name": "Recipe revised",
             "author": {
-                "id": self.author.id,
-                "email": self.author.email,
-                "username": self.author.username,
+                "id": cls.author.id,
+                "email": cls.author.email,
+                "username": cls.author.username,
             },
             "serves": 51,
             "preparation_time_in_minutes": 510,
             "preparation": "preparation steps again",
             "ingredients": [
                 {
-                    "id": self.recipe_ingredient2.id,
+                    "public_id": cls.recipe_ingredient2.public_id,
                     "ingredient": {
-                        "id": self.ingredient2.id,
-                        "name": self.ingredient2.name,
+                        "public_id": cls.ingredient2.public_id,
+                        "name": cls.ingredient2.name,
                     },
                     "unit": {
-                        "id": self.unit2.id,
-                        "name": self.unit2.name,
-                        "abbreviation": self.unit2.abbreviation,
+                        "public_id": cls.unit2.public_id,
+                        "name": cls.unit2.name,
+                        "abbreviation": cls.unit2.abbreviation,
                     },
                     "quantity": 51,
                 }
             ],
         }
 
+    def get_list_data(self):
+        return {"author": self.author}
+
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = result and isinstance(data["author"]["id"], int)
-            result = result and isinstance(data["author"]["username"], str)
-            result = result and isinstance(data["author"]["email"], str)
-            result = result and isinstance(
-                data["preparation_time_in_minutes"], int
-            )
-            result = result and isinstance(data["preparation"], str)
+            if not is_uuid(data["public_id"]):
+                return False
+            if not isinstance(data["author"]["id"], int):
+                return False
+            if not isinstance(data["author"]["username"], str):
+                return False
+            if not isinstance(data["author"]["email"], str):
+                return False
+            if not isinstance(data["preparation_time_in_minutes"], int):
+                return False
+            if not isinstance(data["preparation"], str):
+                return False
             if data.get("ingredients"):
-                result = (
-                    result
-                    and isinstance(
-                        data["ingredients"][0]["ingredient"]["id"], str
-                    )
-                    and re.match(
-                        pattern=UUID_PATTERN,
-                        string=data["ingredients"][0]["ingredient"]["id"],
-                    )
-                )
-                result = (
-                    result
-                    and isinstance(
-                        data["ingredients"][0]["ingredient"]["name"], str
-                    )
-                    and 0
-                    < len(data["ingredients"][0]["ingredient"]["name"])
-                    <= 255
-                )
-                result = (
-                    result
-                    and isinstance(data["ingredients"][0]["unit"]["id"], str)
-                    and re.match(
-                        pattern=UUID_PATTERN,
-                        string=data["ingredients"][0]["unit"]["id"],
+                ingredient = data["ingredients"][0]
+                if not is_uuid(ingredient["ingredient"]["public_id"]):
+                    return False
+                if not is_text(ingredient["ingredient"]["name"], 255):
+                    return False
+                if not is_uuid(ingredient["unit"]["public_id"]):
+                    return False
+                if not is_text(ingredient["unit"]["name"], 255):
+                    return False
+                if not is_text(ingredient["unit"]["abbreviation"], 10):
+                    return False
+        except (KeyError, IndexError, TypeError):
+            return False
+
+        return True
+
+    def test_related_lookups_follow_nested_serializers(self):
+        self.assertEqual(
+            (
+                ("author",),
+                (
+                    "ingredients",
+                    "ingredients__ingredient",
+                    "ingredients__unit",
+                ),
+            ),
+            related_lookups(RecipeSerializer),
+        )
+
+    def add_ingredients(self, recipe):
+        # fresh rows, the class fixtures are shared by every test
+        return RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=self.ingredient,
+                    unit=self.unit,
+                    quantity=500000,
+                ),
+                RecipeIngredient(
+                    recipe=recipe,
+                    ingredient=self.ingredient2,
+                    unit=self.unit2,
+                    quantity=10000,
+                ),
+            ]
+        )
+
+    def test_setup_eager_loading_avoids_nested_queries(self):
+        recipe = self.create_instance()
+        self.add_ingredients(recipe)
+        qset = RecipeSerializer.setup_eager_loading(
+            Recipe.objects.filter(pk=recipe.pk)
+        )
+        with self.assertNumQueries(2):
+            data = RecipeSerializer(qset, many=True).data
+        self.assertEqual(2, len(data[0]["ingredients"]))
+
+    def test_representation_prefetches_when_not_eager_loaded(self):
+        recipe = self.create_instance()
+        self.add_ingredients(recipe)
+        recipe = Recipe.objects.select_related("author").get(pk=recipe.pk)
+        with self.assertNumQueries(1):
+            data = RecipeSerializer(recipe).data
+        self.assertEqual(2, len(data["ingredients"]))
+
+    def test_list_representation_prefetches_once(self):
+        recipes = baker.make(self.model_str, _quantity=3)
+        for recipe in recipes:
+            baker.make(
+                "core.RecipeIngredient",
+                recipe=recipe,
+                unit=self.unit,
+                ingredient=self.ingredient,
+                _quantity=2,
+            )
+        qset = Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes])
+        with self.assertNumQueries(3):
+            data = RecipeSerializer(qset, many=True).data
+        self.assertEqual([2, 2, 2], [len(r["ingredients"]) for r in data])
+
+    def test_representation_matches_generic_serializer(self):
+        recipe = self.create_instance()
+        recipe_ingredient, _ = self.add_ingredients(recipe)
+        serializer = RecipeSerializer()
+        ingredient_serializer = RecipeIngredientSerializer()
+
+        self.assertEqual(
+            orjson.loads(
+                JSONRenderer().render(serializer.to_representation(recipe))
+            ),
+            orjson.loads(
+                JSONRenderer().render(
+                    super(RecipeSerializer, serializer).to_representation(
+                        recipe
                     )
                 )
-                result = (
-                    result
-                    and isinstance(data["ingredients"][0]["unit"]["name"], str)
-                    and 0 < len(data["ingredients"][0]["unit"]["name"]) <= 255
+            ),
+        )
+        self.assertEqual(
+            orjson.loads(
+                JSONRenderer().render(
+                    ingredient_serializer.to_representation(recipe_ingredient)
                 )
-                result = (
-                    result
-                    and isinstance(
-                        data["ingredients"][0]["unit"]["abbreviation"], str
-                    )
-                    and 0
-                    < len(data["ingredients"][0]["unit"]["abbreviation"])
-                    <= 10
+            ),
+            orjson.loads(
+                JSONRenderer().render(
+                    super(
+                        RecipeIngredientSerializer, ingredient_serializer
+                    ).to_representation(recipe_ingredient)
                 )
-        except:
-            result = False
-
-        return result
+            ),
+        )
 
 
 class UnitViewSetTestCase(TestCase, BaseAPITestCaseMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first_element = Unit.objects.create(name="gram", abbreviation="g")
+        cls.duplicated_post_data = {
+            "name": cls.first_element.name,
+            "abbreviation": cls.first_element.abbreviation,
+        }
+        cls.user = User.objects.create(email="test@test.com")
+
+        cls.post_data = {"name": "kilogram", "abbreviation": "kg"}
+        cls.update_data = {"name": "kilogram force", "abbreviation": "kgf"}
+
     def setUp(self):
         self.required_fields = {"name", "abbreviation"}
         self.unique_fields = (
@@ -729,127 +867,222 @@ class UnitViewSetTestCase(TestCase, BaseAPITestCaseMixin):
         self.base_url = "/api/units/"
         self.model_class_str = "core.Unit"
         self.model_class = Unit
+        # cached pages outlive the rows rolled back after earlier tests
+        cache.clear()
 
         self.client = APIClient()
-        self.first_element = self.model_class.objects.create(
-            name="gram", abbreviation="g"
+        self.client.force_authenticate(user=self.user)
+
+    def assert_result_and_stored(self, stored, result):
+        self.assertEqual(str(stored.public_id), result.get("public_id"))
+        self.assertEqual(stored.abbreviation, result.get("abbreviation"))
+        self.assertEqual(stored.name, result.get("name"))
+
+    def test_list_is_cached_until_units_change(self):
+        self.client.get(self.base_url, format="json")
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.base_url, format="json")
+        self.assertEqual(self.start_counter, response.data["count"])
+
+        self.client.post(self.base_url, data=self.post_data, format="json")
+        response = self.client.get(self.base_url, format="json")
+        self.assertEqual(self.start_counter + 1, response.data["count"])
+
+        self.client.put(
+            "{}{}/".format(self.base_url, self.first_element.public_id),
+            data=self.update_data,
+            format="json",
+        )
+        response = self.client.get(self.base_url, format="json")
+        self.assertIn(
+            self.update_data["name"],
+            [unit["name"] for unit in response.data["results"]],
+        )
+
+    def test_list_is_refreshed_by_units_created_with_a_recipe(self):
+        self.client.get(self.base_url, format="json")
+        RecipeSerializer._get_or_create_by_name(
+            Unit, [{"name": "cup", "abbreviation": "c"}]
+        )
+        # TestCase never commits, so the pending callbacks run by hand
+        callbacks, connection.run_on_commit = connection.run_on_commit, []
+        for _, callback in callbacks:
+            callback()
+
+        response = self.client.get(self.base_url, format="json")
+
+        self.assertEqual(self.start_counter + 1, response.data["count"])
+
+    def test_list_cache_key_is_valid_for_memcached(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", CacheKeyWarning)
+            response = self.client.get(self.base_url, format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+
+    def test_unfiltered_count_uses_the_planner_estimate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE core_unit")
+        cache.clear()
+        paginator = EstimatedCountPaginator(Unit.objects.all(), 10)
+        paginator.estimate_threshold = 1
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.start_counter, paginator.count)
+
+        paginator = EstimatedCountPaginator(Unit.objects.all(), 10)
+        paginator.estimate_threshold = 1
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.start_counter, paginator.count)
+
+        paginator = EstimatedCountPaginator(
+            Unit.objects.filter(name="kilogram"), 10
         )
+        paginator.estimate_threshold = 1
+
+        with self.assertNumQueries(1):
+            self.assertEqual(0, paginator.count)
 
-        self.post_data = {"name": "kilogram", "abbreviation": "kg"}
-        self.update_data = {"name": "kilogram force", "abbreviation": "kgf"}
+    def paginate(self, estimate, page):
+        class Paginator(EstimatedCountPaginator):
+            estimate_threshold = 1
 
-        self.user, _ = get_user_model().objects.get_or_create(
-            email="test@test.com"
+            def get_estimate(self, table):
+                return estimate
+
+        pagination = CustomPageNumberPagination()
+        pagination.django_paginator_class = Paginator
+        request = Request(
+            APIRequestFactory().get(
+                self.base_url, {"page": page, "page_size": 1}
+            )
+        )
+        units = pagination.paginate_queryset(
+            Unit.objects.order_by("name", "id"), request
+        )
+        return (
+            [unit.name for unit in units],
+            pagination.get_next_link(),
+            pagination.page.paginator.count,
         )
-        self.models_to_clean = (Unit, get_user_model())
 
-    def assert_result_and_stored(self, stored, result):
-        self.assertEqual(str(stored.id), result.get("id"))
-        self.assertEqual(stored.abbreviation, result.get("abbreviation"))
-        self.assertEqual(stored.name, result.get("name"))
+    def test_estimated_pages_follow_the_actual_rows(self):
+        Unit.objects.bulk_create(
+            [
+                Unit(name="cup", abbreviation="c"),
+                Unit(name="litre", abbreviation="l"),
+            ]
+        )
+        for estimate in (1, 6):
+            with self.subTest(estimate=estimate):
+                names = []
+                for page in (1, 2, 3):
+                    units, next_link, count = self.paginate(estimate, page)
+                    names += units
+                    self.assertEqual(page < 3, next_link is not None)
+                self.assertEqual(["cup", "gram", "litre"], names)
+                self.assertEqual(3, count)
+                with self.assertRaises(NotFound):
+                    self.paginate(estimate, 4)
 
 
 class IngredientViewSetTestCase(TestCase, BaseAPITestCaseMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.first_element = Ingredient.objects.create(name="rice")
+        cls.duplicated_post_data = {"name": cls.first_element.name}
+        cls.user = User.objects.create(email="test@test.com")
+
+        cls.post_data = {"name": "cheese"}
+        cls.update_data = {"name": "parmesan"}
+
     def setUp(self):
         self.required_fields = {"name"}
         self.unique_fields = ("name",)
         self.base_url = "/api/ingredients/"
         self.model_class_str = "core.Ingredient"
         self.model_class = Ingredient
+        # cached pages outlive the rows rolled back after earlier tests
+        cache.clear()
 
         self.client = APIClient()
-        self.first_element = self.model_class.objects.create(name="rice")
-
-        self.post_data = {"name": "cheese"}
-        self.update_data = {"name": "parmesan"}
-
-        self.user, _ = get_user_model().objects.get_or_create(
-            email="test@test.com"
-        )
-        self.models_to_clean = (Unit, get_user_model())
+        self.client.force_authenticate(user=self.user)
 
     def assert_result_and_stored(self, stored, result):
-        self.assertEqual(str(stored.id), result.get("id"))
+        self.assertEqual(str(stored.public_id), result.get("public_id"))
         self.assertEqual(stored.name, result.get("name"))
 
 
 class RecipeViewSetSetTestCase(TestCase, BaseAPITestCaseMixin):
-    def setUp(self):
-        self.required_fields = {
-            "name",
-            "serves",
-            "preparation_time_in_minutes",
-            "preparation",
-            "author",
-        }
-        self.unique_fields = {}
-        self.base_url = "/api/recipes/"
-        self.model_class_str = "core.Recipe"
-        self.model_class = Recipe
-
-        self.unit = baker.make("core.Unit")
-        self.unit2 = baker.make("core.Unit")
-        self.ingredient = baker.make("core.Ingredient")
-        self.ingredient2 = baker.make("core.Ingredient")
-
-        self.user, _ = get_user_model().objects.get_or_create(
-            email="test@test.com", username="foo"
+    @classmethod
+    def setUpTestData(cls):
+        cls.unit, cls.unit2 = Unit.objects.bulk_create(
+            [
+                Unit(name="teaspoon", abbreviation="tsp"),
+                Unit(name="tablespoon", abbreviation="tbsp"),
+            ]
+        )
+        cls.ingredient, cls.ingredient2 = Ingredient.objects.bulk_create(
+            [Ingredient(name="flour"), Ingredient(name="sugar")]
         )
 
-        self.client = APIClient()
-        self.first_element = self.model_class.objects.create(
+        cls.user = User.objects.create(email="test@test.com", username="foo")
+
+        cls.first_element = Recipe.objects.create(
             name="cheese pizza",
             serves=4,
             preparation="prep",
             preparation_time_in_minutes=15,
-            author=self.user,
+            author=cls.user,
         )
 
-        self.post_data = {
+        cls.post_data = {
             "name": "cheese pizza",
             "serves": 4,
             "preparation_time_in_minutes": 30,
             "preparation": "bake it",
             "author": {
-                "id": self.user.id,
-                "username": self.user.username,
-                "email": self.user.email,
+                "id": cls.user.id,
+                "username": cls.user.username,
+                "email": cls.user.email,
             },
             "ingredients": [
                 {
                     "ingredient": {
-                        "id": self.ingredient.id,
-                        "name": self.ingredient.name,
+                        "public_id": cls.ingredient.public_id,
+                        "name": cls.ingredient.name,
                     },
                     "unit": {
-                        "id": self.unit.id,
-                        "name": self.unit.name,
-                        "abbreviation": self.unit.abbreviation,
+                        "public_id": cls.unit.public_id,
+                        "name": cls.unit.name,
+                        "abbreviation": cls.unit.abbreviation,
                     },
                     "quantity": 42,
                 }
             ],
         }
-        self.update_data = {
+        cls.update_data = {
             "name": "cheesier pizza",
             "serves": 8,
             "preparation_time_in_minutes": 60,
             "preparation": "bake it again",
             "author": {
-                "id": self.user.id,
-                "username": self.user.username,
-                "email": self.user.email,
+                "id": cls.user.id,
+                "username": cls.user.username,
+                "email": cls.user.email,
             },
             "ingredients": [
                 {
                     "ingredient": {
-                        "id": self.ingredient.id,
-                        "name": self.ingredient.name,
+                        "public_id": cls.ingredient.public_id,
+                        "name": cls.ingredient.name,
                     },
                     "unit": {
-                        "id": self.unit.id,
-                        "name": self.unit.name,
-                        "abbreviation": self.unit.abbreviation,
+                        "public_id": cls.unit.public_id,
+                        "name": cls.unit.name,
+                        "abbreviation": cls.unit.abbreviation,
                     },
                     "quantity": 42,
                 },
@@ -858,32 +1091,267 @@ class RecipeViewSetSetTestCase(TestCase, BaseAPITestCaseMixin):
                         "name": "Bigger Cheese",
                     },
                     "unit": {
-                        "id": self.unit.id,
-                        "name": self.unit.name,
-                        "abbreviation": self.unit.abbreviation,
+                        "public_id": cls.unit.public_id,
+                        "name": cls.unit.name,
+                        "abbreviation": cls.unit.abbreviation,
                     },
                     "quantity": 420,
                 },
             ],
         }
-        self.models_to_clean = (
-            Unit,
-            Ingredient,
-            RecipeIngredient,
-            Recipe,
-            get_user_model(),
-        )
+
+    def setUp(self):
+        self.required_fields = {
+            "name",
+            "serves",
+            "preparation_time_in_minutes",
+            "preparation",
+            "author",
+        }
+        self.unique_fields = {}
+        self.base_url = "/api/recipes/"
+        self.model_class_str = "core.Recipe"
+        self.model_class = Recipe
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_list_data(self):
+        return {"author": self.user}
 
     def assert_result_and_stored(self, stored, result):
-        self.assertEqual(str(stored.id), result.get("id"))
+        self.assertEqual(stored.public_id, result.get("public_id"))
         self.assertEqual(stored.name, result.get("name"))
         self.assertEqual(stored.serves, result.get("serves"))
         self.assertEqual(
             stored.preparation_time_in_minutes,
             result.get("preparation_time_in_minutes"),
         )
-        self.assertEqual(stored.preparation, result.get("preparation"))
+        if "preparation" in result:
+            # the list endpoint leaves the preparation text out
+            self.assertEqual(stored.preparation, result.get("preparation"))
         self.assertEqual(stored.author.id, result.get("author").get("id"))
         self.assertEqual(
             stored.ingredients.all().count(), len(result.get("ingredients"))
         )
+
+    def test_list_authenticated_queries_do_not_grow_with_results(self):
+        baker.make(
+            "core.RecipeIngredient",
+            recipe=self.first_element,
+            unit=self.unit,
+            ingredient=self.ingredient,
+        )
+        for recipe in baker.make(
+            self.model_class_str, author=self.user, _quantity=5
+        ):
+            baker.make(
+                "core.RecipeIngredient",
+                recipe=recipe,
+                unit=self.unit2,
+                ingredient=self.ingredient2,
+            )
+        # the first list also reads the cached planner estimate
+        self.client.get(self.base_url, format="json")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.base_url, format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            orjson.loads(
+                JSONRenderer().render(
+                    RecipeListSerializer(
+                        RecipeListSerializer.setup_eager_loading(
+                            self.model_class.objects.all()
+                        ),
+                        many=True,
+                    ).data
+                )
+            ),
+            orjson.loads(response.content).get("results"),
+        )
+
+    def test_list_is_built_from_get_queryset(self):
+        class AuthorRecipeViewSet(RecipeViewSet):
+            def get_queryset(self):
+                return super().get_queryset().filter(author=self.request.user)
+
+        other = User.objects.create(email="other@test.com", username="bar")
+        Recipe.objects.create(
+            name="other pizza",
+            serves=1,
+            preparation_time_in_minutes=5,
+            author=other,
+        )
+        request = APIRequestFactory().get(self.base_url)
+        force_authenticate(request, user=self.user)
+
+        response = AuthorRecipeViewSet.as_view({"get": "list"})(request)
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(
+            [self.first_element.name],
+            [result["name"] for result in response.data["results"]],
+        )
+
+    def test_list_authenticated_omits_preparation(self):
+        response = self.client.get(self.base_url, format="json")
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        result = orjson.loads(response.content).get("results")[0]
+        self.assertNotIn("preparation", result)
+
+        response = self.client.get(
+            "{}{}/".format(self.base_url, self.first_element.public_id),
+            format="json",
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        result = orjson.loads(response.content)
+        self.assertEqual(self.first_element.preparation, result["preparation"])
+
+    def test_update_replaces_ingredients(self):
+        baker.make(
+            "core.RecipeIngredient",
+            recipe=self.first_element,
+            unit=self.unit2,
+            ingredient=self.ingredient2,
+        )
+
+        response = self.client.put(
+            "{}{}/".format(self.base_url, self.first_element.public_id),
+            data=self.update_data,
+            format="json",
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        self.assertEqual(2, len(orjson.loads(response.content)["ingredients"]))
+        self.assertEqual(2, RecipeIngredient.objects.all().count())
+        self.assertFalse(
+            RecipeIngredient.objects.filter(
+                ingredient=self.ingredient2
+            ).exists()
+        )
+
+    def test_update_keeps_ingredients_sent_with_their_public_id(self):
+        kept, removed = RecipeIngredient.objects.bulk_create(
+            [
+                RecipeIngredient(
+                    recipe=self.first_element,
+                    unit=self.unit,
+                    ingredient=self.ingredient,
+                    quantity=1000,
+                ),
+                RecipeIngredient(
+                    recipe=self.first_element,
+                    unit=self.unit2,
+                    ingredient=self.ingredient2,
+                    quantity=2000,
+                ),
+            ]
+        )
+        _data = copy(self.update_data)
+        _data["ingredients"] = [
+            dict(
+                self.update_data["ingredients"][0],
+                public_id=str(kept.public_id),
+                quantity=3,
+            ),
+            self.update_data["ingredients"][1],
+        ]
+
+        response = self.client.put(
+            "{}{}/".format(self.base_url, self.first_element.public_id),
+            data=_data,
+            format="json",
+        )
+
+        self.assertEqual(HTTP_200_OK, response.status_code)
+        result = orjson.loads(response.content)["ingredients"]
+        self.assertEqual(str(kept.public_id), result[0]["public_id"])
+        self.assertEqual(3, result[0]["quantity"])
+        self.assertEqual("Bigger Cheese", result[1]["ingredient"]["name"])
+        self.assertEqual(
+            3000, RecipeIngredient.objects.get(pk=kept.pk).quantity
+        )
+        self.assertFalse(
+            RecipeIngredient.objects.filter(pk=removed.pk).exists()
+        )
+        self.assertEqual(2, self.first_element.ingredients.count())
+
+    def test_create_reuses_existing_ingredients_and_units(self):
+        ingredients_counter = Ingredient.objects.all().count()
+        units_counter = Unit.objects.all().count()
+
+        response = self.client.post(
+            self.base_url, data=self.update_data, format="json"
+        )
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+
+        self.assertEqual(
+            ingredients_counter + 1, Ingredient.objects.all().count()
+        )
+        self.assertEqual(units_counter, Unit.objects.all().count())
+        stored = self.model_class.objects.get(
+            public_id=orjson.loads(response.content).get("public_id")
+        )
+        self.assertEqual(
+            {self.ingredient.name, "Bigger Cheese"},
+            set(stored.ingredients.values_list("ingredient__name", flat=True)),
+        )
+
+    def test_create_queries_do_not_grow_with_ingredients(self):
+        _data = copy(self.post_data)
+        _data["ingredients"] = [
+            {
+                "ingredient": {"name": "ingredient {}".format(index)},
+                "unit": {
+                    "name": "unit {}".format(index),
+                    "abbreviation": "u{}".format(index),
+                },
+                "quantity": index,
+            }
+            for index in range(10)
+        ]
+
+        with self.assertNumQueries(10):
+            response = self.client.post(
+                self.base_url, data=_data, format="json"
+            )
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        self.assertEqual(10, RecipeIngredient.objects.all().count())
+
+    def test_create_bad_request_when_unit_abbreviation_is_taken(self):
+        _data = copy(self.post_data)
+        _data["ingredients"] = [
+            {
+                "ingredient": {"name": self.ingredient.name},
+                "unit": {
+                    "name": "another unit",
+                    "abbreviation": self.unit.abbreviation,
+                },
+                "quantity": 1,
+            }
+        ]
+
+        response = self.client.post(self.base_url, data=_data, format="json")
+
+        self.assertEqual(HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(
+            self.start_counter, self.model_class.objects.all().count()
+        )
+
+    def test_create_stores_quantity_in_thousandths(self):
+        _data = copy(self.post_data)
+        _data["ingredients"] = [
+            dict(_data["ingredients"][0], quantity=1.25),
+        ]
+
+        response = self.client.post(self.base_url, data=_data, format="json")
+
+        self.assertEqual(HTTP_201_CREATED, response.status_code)
+        result = orjson.loads(response.content)
+        self.assertEqual(1.25, result["ingredients"][0]["quantity"])
+        self.assertEqual(1250, RecipeIngredient.objects.get().quantity)
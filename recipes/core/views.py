@@ -1,42 +1,269 @@
-from rest_framework.pagination import PageNumberPagination
+from functools import lru_cache
+from hashlib import md5
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.relations import (
+    ManyRelatedField,
+    RelatedField,
+    SlugRelatedField,
+)
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
 from rest_framework.viewsets import ModelViewSet
 
+from core.cache import bump_list_cache, list_cache_version
 from core.models import Ingredient, Recipe, Unit
 from core.serializers import (
     IngredientSerializer,
+    RecipeListSerializer,
     RecipeSerializer,
     UnitSerializer,
 )
 
 
+class EstimatedCountPaginator(Paginator):
+    # below this many rows an exact COUNT(*) is cheap enough
+    estimate_threshold = 100000
+    # the statistics only change on (auto)ANALYZE, so they are read at
+    # most once a minute per table
+    estimate_timeout = 60
+
+    @cached_property
+    def estimate(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            # an unfiltered list counts the whole table, which the
+            # planner statistics already estimate
+            estimate = self.get_estimate(queryset.model._meta.db_table)
+            if estimate >= self.estimate_threshold:
+                return int(estimate)
+        return None
+
+    @cached_property
+    def count(self):
+        if self.estimate is not None:
+            return self.estimate
+        return super().count
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # the estimate drifts either way between ANALYZE runs, so page()
+            # decides from the fetched rows whether a later page exists
+            if self.estimate is None or int(number) < 1:
+                raise
+            return int(number)
+
+    def page(self, number):
+        if self.estimate is None:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        # one extra row tells whether there is a next page
+        rows = list(self.object_list[bottom : bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage(_("That page contains no results"))
+        if len(rows) > self.per_page:
+            self.count = max(self.count, bottom + len(rows))
+        else:
+            # the last page gives the exact count
+            self.count = bottom + len(rows)
+        self.__dict__.pop("num_pages", None)
+        return self._get_page(rows[: self.per_page], number, self)
+
+    def get_estimate(self, table):
+        key = "reltuples:{}".format(table)
+        estimate = cache.get(key)
+        if estimate is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [table],
+                )
+                estimate = cursor.fetchone()[0]
+            cache.set(key, estimate, self.estimate_timeout)
+        return estimate
+
+
 class CustomPageNumberPagination(PageNumberPagination):
+    django_paginator_class = EstimatedCountPaginator
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = "page_size"
+
+
+class CustomCursorPagination(CursorPagination):
+    # seeks past the last row seen instead of counting and skipping rows
+    ordering = "-created_at"
     page_size = 10
     max_page_size = 100
     page_size_query_param = "page_size"
 
 
-class UnitViewSet(ModelViewSet):
+@lru_cache(maxsize=None)
+def related_lookups(serializer_class):
+    select, prefetch = [], []
+    _collect_related_lookups(serializer_class(), "", select, prefetch, False)
+    return tuple(select), tuple(prefetch)
+
+
+def _collect_related_lookups(serializer, prefix, select, prefetch, many):
+    for field in serializer.fields.values():
+        if field.source == "*":
+            continue
+        lookup = prefix + field.source.replace(".", "__")
+        if isinstance(field, (ListSerializer, ManyRelatedField)):
+            prefetch.append(lookup)
+            child = getattr(field, "child", None)
+            if isinstance(child, BaseSerializer):
+                _collect_related_lookups(
+                    child, lookup + "__", select, prefetch, True
+                )
+        elif isinstance(field, BaseSerializer):
+            (prefetch if many else select).append(lookup)
+            _collect_related_lookups(
+                field, lookup + "__", select, prefetch, many
+            )
+        elif (
+            isinstance(field, RelatedField)
+            and not field.use_pk_only_optimization()
+        ):
+            # primary key fields read the local column and need no join
+            (prefetch if many else select).append(lookup)
+
+
+@lru_cache(maxsize=None)
+def loaded_fields(serializer_class):
+    fields = []
+    if not _collect_loaded_fields(serializer_class(), "", fields):
+        return None
+    return tuple(fields)
+
+
+def _collect_loaded_fields(serializer, prefix, fields):
+    opts = serializer.Meta.model._meta
+    for field in serializer.fields.values():
+        if isinstance(field, (ListSerializer, ManyRelatedField)):
+            # prefetched with their own queries
+            continue
+        try:
+            opts.get_field(field.source)
+        except FieldDoesNotExist:
+            # sources like "*", properties or dotted paths may read any
+            # column, so nothing is left out
+            return False
+        lookup = prefix + field.source
+        fields.append(lookup)
+        if isinstance(field, BaseSerializer):
+            if not _collect_loaded_fields(field, lookup + "__", fields):
+                return False
+        elif isinstance(field, SlugRelatedField):
+            fields.append("{}__{}".format(lookup, field.slug_field))
+    return True
+
+
+class AutoPrefetchViewSetMixin:
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "setup_eager_loading"):
+            # serializers that tune their own loading keep it
+            return serializer_class.setup_eager_loading(queryset)
+        select, prefetch = related_lookups(serializer_class)
+        queryset = queryset.select_related(*select).prefetch_related(*prefetch)
+        fields = loaded_fields(serializer_class)
+        if self.action == "list" and fields is not None:
+            # list rows are only rendered, never saved back
+            queryset = queryset.only(*fields)
+        return queryset
+
+
+class CachedListMixin:
+    # writes through the viewset bump the model's list version, so pages
+    # cached under the old one are never served again. Writes that bypass
+    # the API, like the admin or QuerySet.update(), have to call
+    # bump_list_cache themselves or are served stale until the timeout.
+    list_cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        model = self.queryset.model
+        key = "list:{}:{}:{}".format(
+            model._meta.label_lower,
+            list_cache_version(model),
+            md5(request.build_absolute_uri().encode()).hexdigest(),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, self.list_cache_timeout)
+        return Response(data)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        bump_list_cache(self.queryset.model)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        bump_list_cache(self.queryset.model)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_list_cache(self.queryset.model)
+
+
+class UnitViewSet(CachedListMixin, AutoPrefetchViewSetMixin, ModelViewSet):
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
-    filterset_fields = ("id", "name")
+    lookup_field = "public_id"
+    filterset_fields = ("public_id", "name")
     pagination_class = CustomPageNumberPagination
 
 
-class IngredientViewSet(ModelViewSet):
+class IngredientViewSet(
+    CachedListMixin, AutoPrefetchViewSetMixin, ModelViewSet
+):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
-    filterset_fields = ("id", "name")
+    lookup_field = "public_id"
+    filterset_fields = ("public_id", "name")
     pagination_class = CustomPageNumberPagination
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(AutoPrefetchViewSetMixin, ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
+    lookup_field = "public_id"
     filterset_fields = (
-        "id",
+        "public_id",
         "name",
         "serves",
         "preparation_time_in_minutes",
         "author",
     )
     pagination_class = CustomPageNumberPagination
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return RecipeListSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        # values() selects only the listed columns, so preparation is never
+        # loaded, and the related rows come from represent_values instead
+        queryset = RecipeListSerializer.setup_values(
+            self.filter_queryset(self.get_queryset().prefetch_related(None))
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                RecipeListSerializer.represent_values(page)
+            )
+        return Response(RecipeListSerializer.represent_values(list(queryset)))
@@ -0,0 +1,31 @@
+from django_filters.rest_framework import FilterSet, ModelChoiceFilter
+
+from core.models import Recipe
+from social.models import Comment, Like
+
+
+def public_id_filter(field_name, model):
+    # the API renders related rows by public_id, so they are filtered by it
+    # too, and the resolved row still filters on the indexed foreign key
+    return ModelChoiceFilter(
+        field_name=field_name,
+        to_field_name="public_id",
+        queryset=model.objects.only("pk"),
+    )
+
+
+class LikeFilter(FilterSet):
+    recipe = public_id_filter("recipe", Recipe)
+    comment = public_id_filter("comment", Comment)
+
+    class Meta:
+        model = Like
+        fields = ("public_id", "recipe", "comment", "user")
+
+
+class CommentFilter(FilterSet):
+    recipe = public_id_filter("recipe", Recipe)
+
+    class Meta:
+        model = Comment
+        fields = ("public_id", "recipe", "user")
@@ -0,0 +1,147 @@
+import uuid
+
+from django.db import migrations, models
+
+TABLES = ("social_comment", "social_like")
+
+FOREIGN_KEYS = """
+    SELECT con.conrelid::regclass::text, con.conname, att.attname,
+        con.confrelid::regclass::text, pg_get_constraintdef(con.oid)
+    FROM pg_constraint con
+    JOIN pg_attribute att
+        ON att.attrelid = con.conrelid AND att.attnum = con.conkey[1]
+    WHERE con.contype = 'f' AND con.confrelid::regclass::text = ANY(%s)
+"""
+
+NEW_NUMBERS = """
+    UPDATE {table} SET new_id = numbered.number FROM (
+        SELECT id, row_number() OVER (ORDER BY created_at, id) AS number
+        FROM {table}
+    ) AS numbered WHERE {table}.id = numbered.id
+"""
+
+
+def _convert_primary_keys(schema_editor, new_type, new_id):
+    # Every column pointing at the converted tables is rewritten inside the
+    # same transaction while its foreign key is dropped.
+    execute = schema_editor.execute
+    execute("SET CONSTRAINTS ALL IMMEDIATE")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FOREIGN_KEYS, [list(TABLES)])
+        foreign_keys = cursor.fetchall()
+
+    for table, name, column, referenced, definition in foreign_keys:
+        execute("ALTER TABLE {} DROP CONSTRAINT {}".format(table, name))
+    for table in TABLES:
+        execute("ALTER TABLE {} ADD COLUMN new_id {}".format(table, new_type))
+        execute(new_id.format(table=table))
+    for table, name, column, referenced, definition in foreign_keys:
+        execute(
+            "ALTER TABLE {table} ADD COLUMN new_{column} {type}; "
+            "UPDATE {table} SET new_{column} = target.new_id "
+            "FROM {referenced} AS target WHERE {table}.{column} = target.id; "
+            "ALTER TABLE {table} ALTER COLUMN {column} TYPE {type} "
+            "USING new_{column}; "
+            "ALTER TABLE {table} DROP COLUMN new_{column}".format(
+                table=table,
+                column=column,
+                referenced=referenced,
+                type=new_type,
+            )
+        )
+    for table in TABLES:
+        execute(
+            "ALTER TABLE {table} ALTER COLUMN id TYPE {type} USING new_id; "
+            "ALTER TABLE {table} DROP COLUMN new_id".format(
+                table=table, type=new_type
+            )
+        )
+    for table, name, column, referenced, definition in foreign_keys:
+        execute(
+            "ALTER TABLE {} ADD CONSTRAINT {} {}".format(
+                table, name, definition
+            )
+        )
+
+
+def uuid_to_bigint(apps, schema_editor):
+    _convert_primary_keys(
+        schema_editor,
+        "bigint",
+        "UPDATE {table} SET public_id = id; " + NEW_NUMBERS,
+    )
+    for table in TABLES:
+        schema_editor.execute(
+            "CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id; "
+            "ALTER TABLE {table} ALTER COLUMN id "
+            "SET DEFAULT nextval('{table}_id_seq'); "
+            "SELECT setval('{table}_id_seq', coalesce(max(id), 0) + 1, false) "
+            "FROM {table}".format(table=table)
+        )
+
+
+def bigint_to_uuid(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(
+            "ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT; "
+            "DROP SEQUENCE {table}_id_seq".format(table=table)
+        )
+    _convert_primary_keys(
+        schema_editor, "uuid", "UPDATE {table} SET new_id = public_id"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_bigint_primary_keys"),
+        ("social", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="public_id",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="like",
+            name="public_id",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(uuid_to_bigint, bigint_to_uuid),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="comment",
+                    name="id",
+                    field=models.BigAutoField(
+                        primary_key=True, serialize=False
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="like",
+                    name="id",
+                    field=models.BigAutoField(
+                        primary_key=True, serialize=False
+                    ),
+                ),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="comment",
+            name="public_id",
+            field=models.UUIDField(
+                default=uuid.uuid4, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="like",
+            name="public_id",
+            field=models.UUIDField(
+                default=uuid.uuid4, editable=False, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-14 13:45
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0002_bigint_primary_keys"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="comment",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="like",
+            name="public_id",
+            field=models.UUIDField(
+                default=core.models.uuid7, editable=False, unique=True
+            ),
+        ),
+    ]
@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_index(name, table, columns):
+    return migrations.RunSQL(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({})".format(
+            name, table, columns
+        ),
+        "DROP INDEX CONCURRENTLY IF EXISTS {}".format(name),
+    )
+
+
+def drop_index(name, table, columns):
+    index = create_index(name, table, columns)
+    return migrations.RunSQL(index.reverse_sql, index.sql)
+
+
+class Migration(migrations.Migration):
+    # the indexes are built and dropped CONCURRENTLY, which cannot run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("social", "0003_public_id_uuid7"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                create_index(
+                    "comment_recipe_created_idx",
+                    "social_comment",
+                    "recipe_id, created_at DESC",
+                ),
+                create_index(
+                    "comment_user_created_idx",
+                    "social_comment",
+                    "user_id, created_at DESC",
+                ),
+                create_index(
+                    "like_recipe_created_idx",
+                    "social_like",
+                    "recipe_id, created_at DESC",
+                ),
+                create_index(
+                    "like_user_created_idx",
+                    "social_like",
+                    "user_id, created_at DESC",
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="comment",
+                    index=models.Index(
+                        fields=["recipe", "-created_at"],
+                        name="comment_recipe_created_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="comment",
+                    index=models.Index(
+                        fields=["user", "-created_at"],
+                        name="comment_user_created_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="like",
+                    index=models.Index(
+                        fields=["recipe", "-created_at"],
+                        name="like_recipe_created_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="like",
+                    index=models.Index(
+                        fields=["user", "-created_at"],
+                        name="like_user_created_idx",
+                    ),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                drop_index(
+                    "social_comment_recipe_id_4f9b9084",
+                    "social_comment",
+                    "recipe_id",
+                ),
+                drop_index(
+                    "social_comment_user_id_1de4ccfb",
+                    "social_comment",
+                    "user_id",
+                ),
+                drop_index(
+                    "social_like_recipe_id_226629d6",
+                    "social_like",
+                    "recipe_id",
+                ),
+                drop_index(
+                    "social_like_user_id_09067f26",
+                    "social_like",
+                    "user_id",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="comment",
+                    name="recipe",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        editable=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="core.Recipe",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="comment",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        editable=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="like",
+                    name="recipe",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        editable=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="core.Recipe",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="like",
+                    name="user",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        editable=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
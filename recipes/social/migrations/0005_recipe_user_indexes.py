@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def create_index(name, table, columns):
+    return migrations.RunSQL(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({})".format(
+            name, table, columns
+        ),
+        "DROP INDEX CONCURRENTLY IF EXISTS {}".format(name),
+    )
+
+
+class Migration(migrations.Migration):
+    # the indexes are built and dropped CONCURRENTLY, which cannot run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("social", "0004_recipe_user_created_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                create_index(
+                    "comment_recipe_user_idx",
+                    "social_comment",
+                    "recipe_id, user_id",
+                ),
+                create_index(
+                    "like_recipe_user_idx", "social_like", "recipe_id, user_id"
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="comment",
+                    index=models.Index(
+                        fields=["recipe", "user"],
+                        name="comment_recipe_user_idx",
+                    ),
+                ),
+                migrations.AddIndex(
+                    model_name="like",
+                    index=models.Index(
+                        fields=["recipe", "user"], name="like_recipe_user_idx"
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def comment_foreign_key(on_delete):
+    return (
+        "ALTER TABLE social_like DROP CONSTRAINT {name}, "
+        "ADD CONSTRAINT {name} FOREIGN KEY (comment_id) "
+        "REFERENCES social_comment (id) "
+        "ON DELETE {on_delete} DEFERRABLE INITIALLY DEFERRED"
+    ).format(
+        name="social_like_comment_id_d971614a_fk_social_comment_id",
+        on_delete=on_delete,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("social", "0005_recipe_user_indexes"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    comment_foreign_key("CASCADE"),
+                    comment_foreign_key("NO ACTION"),
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="like",
+                    name="comment",
+                    field=models.ForeignKey(
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        to="social.Comment",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_index(name, table, columns):
+    return migrations.RunSQL(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS {} ON {} ({})".format(
+            name, table, columns
+        ),
+        "DROP INDEX CONCURRENTLY IF EXISTS {}".format(name),
+    )
+
+
+def drop_index(name, table, columns):
+    index = create_index(name, table, columns)
+    return migrations.RunSQL(index.reverse_sql, index.sql)
+
+
+class Migration(migrations.Migration):
+    # the indexes are built and dropped CONCURRENTLY, which cannot run
+    # inside a transaction
+    atomic = False
+
+    dependencies = [
+        ("social", "0006_like_comment_db_cascade"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                create_index(
+                    "comment_reply_created_idx",
+                    "social_comment",
+                    "in_reply_to_id, created_at DESC",
+                ),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name="comment",
+                    index=models.Index(
+                        fields=["in_reply_to", "-created_at"],
+                        name="comment_reply_created_idx",
+                    ),
+                ),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                drop_index(
+                    "social_comment_in_reply_to_id_ada16d1d",
+                    "social_comment",
+                    "in_reply_to_id",
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="comment",
+                    name="in_reply_to",
+                    field=models.ForeignKey(
+                        db_index=False,
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        to="social.Comment",
+                    ),
+                ),
+            ],
+        ),
+    ]
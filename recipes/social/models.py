@@ -1,51 +1,77 @@
 from django.contrib.auth import get_user_model
-from django.db.models import ForeignKey, PROTECT, TextField
+from django.db.models import (
+    DO_NOTHING,
+    ForeignKey,
+    Index,
+    PROTECT,
+    TextField,
+)
 
 from core.models import BaseModel
 
 User = get_user_model()
 
 
+def protected_fk(to, **kwargs):
+    # not writable through the API, and the target cannot be deleted
+    # while rows still point at it
+    return ForeignKey(to, on_delete=PROTECT, editable=False, **kwargs)
+
+
 class UserRecipeModelMixin(BaseModel):
-    user = ForeignKey(
-        User, null=False, blank=False, on_delete=PROTECT, editable=False
-    )
-    recipe = ForeignKey(
-        "core.Recipe",
-        null=False,
-        blank=False,
-        on_delete=PROTECT,
-        editable=False,
-    )
+    # both are covered by the (column, -created_at) indexes of each model
+    user = protected_fk(User, db_index=False)
+    recipe = protected_fk("core.Recipe", db_index=False)
 
     class Meta:
         abstract = True
 
 
 class Comment(UserRecipeModelMixin):
-    in_reply_to = ForeignKey(
-        "self", null=True, blank=False, on_delete=PROTECT, editable=False
-    )
-    content = TextField(null=False, blank=False)
+    # covered by comment_reply_created_idx
+    in_reply_to = protected_fk("self", null=True, db_index=False)
+    content = TextField()
 
     class Meta:
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
         ordering = ("-created_at", "user__username")
+        indexes = (
+            Index(
+                fields=("recipe", "-created_at"),
+                name="comment_recipe_created_idx",
+            ),
+            Index(
+                fields=("user", "-created_at"), name="comment_user_created_idx"
+            ),
+            Index(fields=("recipe", "user"), name="comment_recipe_user_idx"),
+            Index(
+                fields=("in_reply_to", "-created_at"),
+                name="comment_reply_created_idx",
+            ),
+        )
 
 
 class Like(UserRecipeModelMixin):
     # in future versions change for generic foreign Key
     # instead of using two columns
+    # the foreign key cascades in the database (see migration 0006), so
+    # deleting a comment does not load its likes first
     comment = ForeignKey(
-        "social.Comment",
-        null=True,
-        blank=False,
-        on_delete=PROTECT,
-        editable=False,
+        "social.Comment", null=True, on_delete=DO_NOTHING, editable=False
     )
 
     class Meta:
         verbose_name = "Like"
         verbose_name_plural = "Likes"
         ordering = ("-created_at", "user__username")
+        indexes = (
+            Index(
+                fields=("recipe", "-created_at"),
+                name="like_recipe_created_idx",
+            ),
+            Index(
+                fields=("user", "-created_at"), name="like_user_created_idx"
+            ),
+            Index(fields=("recipe", "user"), name="like_recipe_user_idx"),
+        )
@@ -1,25 +1,66 @@
-from rest_framework.serializers import ModelSerializer
+from copy import deepcopy
+from functools import lru_cache
+
+from rest_framework.serializers import (
+    ListSerializer,
+    ModelSerializer,
+    PrimaryKeyRelatedField,
+    SlugRelatedField,
+)
 
 from social.models import Like, Comment
 
 
-class LikeSerializer(ModelSerializer):
+@lru_cache(maxsize=None)
+def compiled_fields(serializer_class):
+    # introspecting the model to build the fields only happens once per
+    # class, every serializer afterwards gets its own copy
+    return super(CompiledFieldsMixin, serializer_class()).get_fields()
+
+
+class CompiledFieldsMixin:
+    def get_fields(self):
+        return deepcopy(compiled_fields(type(self)))
+
+
+class BulkCreateListSerializer(ListSerializer):
+    def create(self, validated_data):
+        # one INSERT for the whole batch instead of one per item
+        model = self.child.Meta.model
+        return model.objects.bulk_create(
+            [model(**attrs) for attrs in validated_data]
+        )
+
+
+class LikeSerializer(CompiledFieldsMixin, ModelSerializer):
+    # the relations are read-only because the model fields are
+    # editable=False. The serializer cannot create on its own: user and
+    # recipe have to be passed to save(), and the viewsets do not pass them
+    user = PrimaryKeyRelatedField(read_only=True)
+    recipe = SlugRelatedField(slug_field="public_id", read_only=True)
+    comment = SlugRelatedField(slug_field="public_id", read_only=True)
+
     class Meta:
         model = Like
         fields = (
-            "id",
+            "public_id",
             "user",
             "recipe",
             "comment",
             "created_at",
         )
+        list_serializer_class = BulkCreateListSerializer
+
 
+class CommentSerializer(CompiledFieldsMixin, ModelSerializer):
+    user = PrimaryKeyRelatedField(read_only=True)
+    recipe = SlugRelatedField(slug_field="public_id", read_only=True)
+    in_reply_to = SlugRelatedField(slug_field="public_id", read_only=True)
 
-class CommentSerializer(ModelSerializer):
     class Meta:
         model = Comment
         fields = (
-            "id",
+            "public_id",
             "user",
             "recipe",
             "in_reply_to",
@@ -27,3 +68,4 @@ class CommentSerializer(ModelSerializer):
             "created_at",
             "updated_at",
         )
+        list_serializer_class = BulkCreateListSerializer
@@ -1,13 +1,24 @@
-import re
-from uuid import UUID
+import uuid
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from model_bakery import baker
+from rest_framework.test import APIRequestFactory, force_authenticate
 
-from core.tests import BaseSerializerTestCaseMixin, UUID_PATTERN
+from core.tests import BaseSerializerTestCaseMixin, bulk_make, is_uuid
+from core.views import loaded_fields
 from social.models import Like, Comment
 from social.serializers import LikeSerializer, CommentSerializer
+from social.views import CommentViewSet, LikeViewSet
+
+User = get_user_model()
+
+
+def make_comment(user, recipe, **attrs):
+    # fixed content, nothing for baker to generate or follow
+    return Comment.objects.create(
+        user=user, recipe=recipe, content="a comment", **attrs
+    )
 
 
 class LikeSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
@@ -17,63 +28,90 @@ class LikeSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
     serializer_class = LikeSerializer
     model = Like
 
-    def setUp(self):
-        self.recipe = baker.make("core.Recipe")
-        self.comment = baker.make("social.Comment")
-        self.user, _ = get_user_model().objects.get_or_create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _ = User.objects.get_or_create(
             email="foo@bar.com", username="foobar"
         )
+        cls.recipe = baker.make("core.Recipe", author=cls.user)
+        cls.comment = make_comment(cls.user, cls.recipe)
 
-    def get_full_data(self):
-        return {
-            "recipe": self.recipe.id,
-            "comment": self.comment.id,
-            "user": self.user.id,
+        cls.full_data = {
+            "recipe": cls.recipe.public_id,
+            "comment": cls.comment.public_id,
+            "user": cls.user.id,
         }
 
-    def get_default_data(self):
-        return {
-            "recipe": self.recipe,
-            "comment": self.comment,
-            "user": self.user,
+        cls.default_data = {
+            "recipe": cls.recipe,
+            "comment": cls.comment,
+            "user": cls.user,
         }
 
-    def get_update_data(self):
-        return {
-            "recipe": self.recipe.id,
-            "comment": self.comment.id,
-            "user": self.user.id,
+        cls.update_data = {
+            "recipe": cls.recipe.public_id,
+            "comment": cls.comment.public_id,
+            "user": cls.user.id,
         }
 
+    def get_list_data(self):
+        return {"recipe": self.recipe, "user": self.user}
+
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = result and isinstance(data["user"], int)
-            if data.get("recipe"):
-                result = (
-                    result
-                    and isinstance(data["recipe"], (str, UUID))
-                    and re.match(
-                        pattern=UUID_PATTERN, string=str(data["recipe"])
-                    )
-                )
-            if data.get("comment"):
-                result = (
-                    result
-                    and isinstance(data["comment"], (str, UUID))
-                    and re.match(
-                        pattern=UUID_PATTERN, string=str(data["comment"])
-                    )
-                )
-        except:
-            result = False
-
-        return result
+            if not is_uuid(data["public_id"], str):
+                return False
+            if not isinstance(data["user"], int):
+                return False
+            if data.get("recipe") and not is_uuid(data["recipe"]):
+                return False
+            if data.get("comment") and not is_uuid(data["comment"]):
+                return False
+        except KeyError:
+            return False
+
+        return True
+
+    def test_viewset_queryset_loads_related_rows(self):
+        bulk_make(
+            self.model_str, 5, comment=self.comment, **self.get_list_data()
+        )
+        with self.assertNumQueries(1):
+            data = LikeSerializer(
+                LikeViewSet(action="list").get_queryset(), many=True
+            ).data
+        self.assertEqual(5, len(data))
+
+    def test_many_are_created_in_one_query(self):
+        serializer = LikeSerializer(data=[{}] * 3, many=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertNumQueries(1):
+            likes = serializer.save(**self.get_list_data())
+        self.assertEqual(3, Like.objects.filter(recipe=self.recipe).count())
+        self.assertTrue(all(like.pk for like in likes))
+
+    def test_deleting_a_comment_deletes_its_likes(self):
+        comment = make_comment(self.user, self.recipe)
+        bulk_make(self.model_str, 3, comment=comment, **self.get_list_data())
+        comment_id = comment.id
+        # replies are still looked up for PROTECT, the likes are not
+        with self.assertNumQueries(2):
+            comment.delete()
+        self.assertFalse(Like.objects.filter(comment_id=comment_id).exists())
+
+    def test_list_loads_only_rendered_columns(self):
+        self.assertEqual(
+            (
+                "public_id",
+                "user",
+                "recipe",
+                "recipe__public_id",
+                "comment",
+                "comment__public_id",
+                "created_at",
+            ),
+            loaded_fields(LikeSerializer),
+        )
 
 
 class CommentSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
@@ -83,64 +121,186 @@ class CommentSerializerTestCase(TestCase, BaseSerializerTestCaseMixin):
     serializer_class = CommentSerializer
     model = Comment
 
-    def setUp(self):
-        self.recipe = baker.make("core.Recipe")
-        self.comment = baker.make("social.Comment")
-        self.user, _ = get_user_model().objects.get_or_create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _ = User.objects.get_or_create(
             email="foo@bar.com", username="foobar"
         )
+        cls.recipe = baker.make("core.Recipe", author=cls.user)
+        cls.comment = make_comment(cls.user, cls.recipe)
 
-    def get_full_data(self):
-        return {
-            "recipe": self.recipe.id,
-            "in_reply_to": self.comment.id,
-            "user": self.user.id,
+        cls.full_data = {
+            "recipe": cls.recipe.public_id,
+            "in_reply_to": cls.comment.public_id,
+            "user": cls.user.id,
             "content": "comments here",
         }
 
-    def get_update_data(self):
-        return {
-            "recipe": self.recipe.id,
-            "in_reply_to": self.comment.id,
-            "user": self.user.id,
+        cls.update_data = {
+            "recipe": cls.recipe.public_id,
+            "in_reply_to": cls.comment.public_id,
+            "user": cls.user.id,
             "content": "comment here  edited",
         }
 
-    def get_default_data(self):
-        return {
-            "recipe": self.recipe,
-            "in_reply_to": self.comment,
-            "user": self.user,
+        cls.default_data = {
+            "recipe": cls.recipe,
+            "in_reply_to": cls.comment,
+            "user": cls.user,
             "content": "comment here",
         }
 
+    def get_list_data(self):
+        return {"recipe": self.recipe, "user": self.user}
+
     def dict_structure_is_valid(self, data):
-        result = True
         try:
-            result = (
-                result
-                and isinstance(data["id"], str)
-                and re.match(pattern=UUID_PATTERN, string=data["id"])
-            )
-            result = result and isinstance(data["user"], int)
-            result = result and isinstance(data["content"], str)
-            if data.get("recipe"):
-                result = (
-                    result
-                    and isinstance(data["recipe"], (str, UUID))
-                    and re.match(
-                        pattern=UUID_PATTERN, string=str(data["recipe"])
-                    )
-                )
-            if data.get("in_reply_to"):
-                result = (
-                    result
-                    and isinstance(data["in_reply_to"], (str, UUID))
-                    and re.match(
-                        pattern=UUID_PATTERN, string=str(data["in_reply_to"])
-                    )
-                )
-        except:
-            result = False
-
-        return result
+            if not is_uuid(data["public_id"], str):
+                return False
+            if not isinstance(data["user"], int):
+                return False
+            if not isinstance(data["content"], str):
+                return False
+            if data.get("recipe") and not is_uuid(data["recipe"]):
+                return False
+            if data.get("in_reply_to") and not is_uuid(data["in_reply_to"]):
+                return False
+        except KeyError:
+            return False
+
+        return True
+
+    def test_many_are_created_in_one_query(self):
+        serializer = CommentSerializer(
+            data=[{"content": "first"}, {"content": "second"}], many=True
+        )
+        self.assertTrue(serializer.is_valid())
+        with self.assertNumQueries(1):
+            comments = serializer.save(**self.get_list_data())
+        self.assertEqual(
+            ["first", "second"], [comment.content for comment in comments]
+        )
+        self.assertTrue(all(comment.pk for comment in comments))
+
+    def test_viewset_queryset_loads_related_rows(self):
+        bulk_make(
+            self.model_str,
+            5,
+            in_reply_to=self.comment,
+            content="a reply",
+            **self.get_list_data()
+        )
+        with self.assertNumQueries(1):
+            data = CommentSerializer(
+                CommentViewSet(action="list")
+                .get_queryset()
+                .filter(in_reply_to=self.comment),
+                many=True,
+            ).data
+        self.assertEqual(5, len(data))
+
+
+class ValidationTestCase(SimpleTestCase):
+    # every related field is read-only, so validation never needs the
+    # database and SimpleTestCase fails the test on any query
+    related_data = {
+        "recipe": str(uuid.uuid4()),
+        "in_reply_to": str(uuid.uuid4()),
+        "comment": str(uuid.uuid4()),
+        "user": 1,
+    }
+
+    def test_like_ignores_related_fields(self):
+        serializer = LikeSerializer(data=self.related_data)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual({}, serializer.validated_data)
+
+    def test_comment_keeps_only_content(self):
+        serializer = CommentSerializer(
+            data={**self.related_data, "content": "comment here"}
+        )
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(
+            {"content": "comment here"}, serializer.validated_data
+        )
+
+    def test_fields_are_copied_for_each_serializer(self):
+        first, second = LikeSerializer(), LikeSerializer()
+        self.assertEqual(list(first.fields), list(second.fields))
+        self.assertIsNot(first.fields["recipe"], second.fields["recipe"])
+        self.assertIs(second, second.fields["recipe"].parent)
+
+    def test_comment_requires_content(self):
+        serializer = CommentSerializer(data=self.related_data)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("content", serializer.errors)
+
+
+class LikeViewSetTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(email="test@test.com")
+        cls.recipe = baker.make("core.Recipe", author=cls.user)
+        bulk_make("social.Like", 12, recipe=cls.recipe, user=cls.user)
+
+    def list(self, url):
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.user)
+        return LikeViewSet.as_view({"get": "list"})(request)
+
+    def test_list_filters_by_public_ids(self):
+        other_recipe = baker.make("core.Recipe", author=self.user)
+        comment = make_comment(self.user, other_recipe)
+        bulk_make("social.Like", 2, recipe=other_recipe, user=self.user)
+        bulk_make(
+            "social.Like",
+            3,
+            recipe=other_recipe,
+            user=self.user,
+            comment=comment,
+        )
+
+        response = self.list(
+            "/likes/?recipe={}".format(other_recipe.public_id)
+        )
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(5, len(response.data["results"]))
+
+        response = self.list("/likes/?comment={}".format(comment.public_id))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(3, len(response.data["results"]))
+
+        response = self.list("/likes/?recipe={}".format(other_recipe.pk))
+        self.assertEqual(400, response.status_code)
+
+        request = APIRequestFactory().get(
+            "/comments/", {"recipe": str(other_recipe.public_id)}
+        )
+        force_authenticate(request, user=self.user)
+        response = CommentViewSet.as_view({"get": "list"})(request)
+        self.assertEqual(
+            [str(comment.public_id)],
+            [result["public_id"] for result in response.data["results"]],
+        )
+
+    def test_list_pages_with_a_cursor(self):
+        first = self.list("/likes/")
+        second = self.list(first.data["next"])
+
+        self.assertEqual(200, first.status_code)
+        self.assertNotIn("count", first.data)
+        self.assertIsNone(first.data["previous"])
+        self.assertIsNone(second.data["next"])
+        self.assertEqual(10, len(first.data["results"]))
+        self.assertEqual(2, len(second.data["results"]))
+
+        public_ids = [
+            like["public_id"]
+            for like in first.data["results"] + second.data["results"]
+        ]
+        created = dict(Like.objects.values_list("public_id", "created_at"))
+        self.assertEqual(12, len(set(public_ids)))
+        self.assertEqual(
+            sorted(created.values(), reverse=True),
+            [created[uuid.UUID(public_id)] for public_id in public_ids],
+        )
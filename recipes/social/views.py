@@ -1,19 +1,22 @@
 from rest_framework.viewsets import ModelViewSet
 
-from core.views import CustomPageNumberPagination
-from social.models import Like
-from social.serializers import LikeSerializer
+from core.views import AutoPrefetchViewSetMixin, CustomCursorPagination
+from social.filters import CommentFilter, LikeFilter
+from social.models import Comment, Like
+from social.serializers import CommentSerializer, LikeSerializer
 
 
-class LikeViewSet(ModelViewSet):
+class LikeViewSet(AutoPrefetchViewSetMixin, ModelViewSet):
     queryset = Like.objects.all()
     serializer_class = LikeSerializer
-    filterset_fields = ("id", "recipe", "comment", "user")
-    pagination_class = CustomPageNumberPagination
+    lookup_field = "public_id"
+    filterset_class = LikeFilter
+    pagination_class = CustomCursorPagination
 
 
-class CommentViewSet(ModelViewSet):
-    queryset = Like.objects.all()
-    serializer_class = LikeSerializer
-    filterset_fields = ("id", "recipe", "user")
-    pagination_class = CustomPageNumberPagination
+class CommentViewSet(AutoPrefetchViewSetMixin, ModelViewSet):
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    lookup_field = "public_id"
+    filterset_class = CommentFilter
+    pagination_class = CustomCursorPagination